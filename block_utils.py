@@ -18,37 +18,61 @@ logger = logging.getLogger(__name__)
 # Путь к файлу с заблокированными пользователями
 BLOCKED_USERS_FILE = Path(__file__).parent / "blocked_users.txt"
 
+# Кэш содержимого файла: (mtime_ns файла, множество ID)
+_blocked_users_cache: tuple[int, frozenset[int]] | None = None
 
-def get_blocked_users() -> Set[int]:
+
+def _load_blocked_users() -> frozenset[int]:
     """
-    Получить множество заблокированных Telegram ID.
+    Прочитать заблокированные ID из файла, используя кэш в памяти.
+
+    Файл перечитывается только если изменилось его время модификации.
 
     Returns:
-        Set[int]: Множество заблокированных ID
+        frozenset[int]: Множество заблокированных ID
     """
-    blocked_users = set()
+    global _blocked_users_cache
 
     try:
-        if BLOCKED_USERS_FILE.exists():
-            with open(BLOCKED_USERS_FILE, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    # Пропускаем пустые строки и комментарии
-                    if not line or line.startswith('#'):
-                        continue
-                    try:
-                        telegram_id = int(line)
-                        blocked_users.add(telegram_id)
-                    except ValueError:
-                        logger.warning(f"Некорректный Telegram ID в файле: {line}")
-        else:
+        try:
+            mtime = BLOCKED_USERS_FILE.stat().st_mtime_ns
+        except FileNotFoundError:
             logger.info("Файл blocked_users.txt не найден, создаем пустой")
             BLOCKED_USERS_FILE.touch()
+            mtime = BLOCKED_USERS_FILE.stat().st_mtime_ns
+
+        if _blocked_users_cache is not None and _blocked_users_cache[0] == mtime:
+            return _blocked_users_cache[1]
+
+        blocked_users = set()
+        with open(BLOCKED_USERS_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                # Пропускаем пустые строки и комментарии
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    telegram_id = int(line)
+                    blocked_users.add(telegram_id)
+                except ValueError:
+                    logger.warning(f"Некорректный Telegram ID в файле: {line}")
+
+        _blocked_users_cache = (mtime, frozenset(blocked_users))
+        return _blocked_users_cache[1]
 
     except Exception as e:
         logger.error(f"Ошибка при чтении файла заблокированных пользователей: {e}")
+        return frozenset()
+
+
+def get_blocked_users() -> Set[int]:
+    """
+    Получить множество заблокированных Telegram ID.
 
-    return blocked_users
+    Returns:
+        Set[int]: Множество заблокированных ID (копия, её можно изменять)
+    """
+    return set(_load_blocked_users())
 
 
 def is_user_blocked(telegram_id: int) -> bool:
@@ -61,7 +85,7 @@ def is_user_blocked(telegram_id: int) -> bool:
     Returns:
         bool: True если пользователь заблокирован
     """
-    return telegram_id in get_blocked_users()
+    return telegram_id in _load_blocked_users()
 
 
 def block_user(telegram_id: int, blocked_by: int | None = None, reason: str | None = None) -> bool:
@@ -171,6 +195,8 @@ def _write_blocked_users_to_file(blocked_users: Set[int]) -> None:
     Args:
         blocked_users: Множество заблокированных ID
     """
+    global _blocked_users_cache
+
     try:
         # Создаем директорию если не существует
         BLOCKED_USERS_FILE.parent.mkdir(parents=True, exist_ok=True)
@@ -189,6 +215,9 @@ def _write_blocked_users_to_file(blocked_users: Set[int]) -> None:
             for user_id in sorted_users:
                 f.write(f"{user_id}\n")
 
+        # Обновляем кэш сразу, не дожидаясь повторного чтения файла
+        _blocked_users_cache = (BLOCKED_USERS_FILE.stat().st_mtime_ns, frozenset(blocked_users))
+
     except Exception as e:
         logger.error(f"Ошибка при записи файла заблокированных пользователей: {e}")
         raise
@@ -41,6 +41,7 @@ from services import (
     get_user_by_telegram_id,
     get_user_deadlines,
     get_user_subscription,
+    invalidate_user_cache,
     reject_deadline_verification,
     request_deadline_verification,
     toggle_subscription,
@@ -318,6 +319,11 @@ async def cmd_register(message: Message) -> None:
             )
             return
 
+        # Объект из кэша get_user_by_telegram_id общий для всех вызывающих:
+        # убираем его из кэша до изменения, чтобы новый ник не попал туда
+        # без commit
+        invalidate_user_cache(user.telegram_id)
+
         # Сохраняем в username
         user.username = identifier
         from db import SessionLocal
@@ -333,6 +339,8 @@ async def cmd_register(message: Message) -> None:
             logger.info(f"Пользователь {user.telegram_id} привязал ник: {identifier}")
         finally:
             session.close()
+            # Пока шёл commit, другой запрос мог снова закэшировать пользователя
+            invalidate_user_cache(user.telegram_id)
 
     except Exception as e:
         logger.error(f"Ошибка при регистрации ника: {e}", exc_info=True)
@@ -7,7 +7,7 @@ from __future__ import annotations
 import os
 from pathlib import Path
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 
@@ -68,8 +68,48 @@ def get_database_url() -> str:
     return f"sqlite:///{default_db_path}"
 
 
+# Сколько писатель ждёт блокировку SQLite, прежде чем вернуть ошибку
+SQLITE_BUSY_TIMEOUT_MS = 30000
+
+def _engine_options(db_url: str) -> dict:
+    """
+    Параметры пула соединений для движка.
+
+    Для сетевых СУБД держим пул живых соединений между проверками и запросами:
+    pre_ping отбрасывает разорванные сервером соединения, recycle - слишком старые.
+    Для SQLite (файл) установка соединения дешёвая, оставляем пул по умолчанию.
+    """
+    if db_url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
+    }
+
+
+_database_url = get_database_url()
+
 # echo=True можно включить при отладке, чтобы видеть SQL-запросы
-engine = create_engine(get_database_url(), echo=False)
+engine = create_engine(_database_url, echo=False, **_engine_options(_database_url))
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        """
+        WAL не блокирует читателей во время записи; NORMAL ускоряет коммиты в WAL.
+
+        busy_timeout заставляет параллельные синхронизации ждать освобождения
+        блокировки записи, а не падать с «database is locked»; временные
+        таблицы и индексы держим в памяти.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
 
 # expire_on_commit=False оставляет данные в объектах после коммита
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
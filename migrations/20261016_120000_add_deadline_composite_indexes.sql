@@ -0,0 +1,8 @@
+-- Migration generated at 2026-10-16T12:00:00.000000
+-- Message: Add deadline composite indexes
+
+
+CREATE INDEX ix_deadline_user_src_srcid ON deadlines (user_id, source, source_id);
+
+CREATE INDEX ix_deadline_user_src_title ON deadlines (user_id, source, title);
+
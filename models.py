@@ -12,7 +12,7 @@ from __future__ import annotations
 
 from datetime import UTC, datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db import Base
@@ -62,6 +62,11 @@ class DeadlineStatus:
 
 class Deadline(Base):
     __tablename__ = "deadlines"
+    __table_args__ = (
+        # Синхронизация ищет дедлайны пользователя по source + source_id или source + title
+        Index("ix_deadline_user_src_srcid", "user_id", "source", "source_id"),
+        Index("ix_deadline_user_src_title", "user_id", "source", "title"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     # Связь по пользователю. В плане указан user_identifier, но в БД лучше хранить внешний ключ на users.id
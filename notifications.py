@@ -4,7 +4,9 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
 from datetime import UTC, datetime, timedelta, timezone
 
 from aiogram import Bot
@@ -19,6 +21,57 @@ logger = logging.getLogger(__name__)
 # Настройка часового пояса (GMT+3, Moscow)
 MOSCOW_TZ = timezone(timedelta(hours=3))
 
+# Общий экземпляр бота для скриптов: одна HTTP-сессия к Telegram на процесс
+_bot: Bot | None = None
+# Блокировка привязана к циклу событий, поэтому создаётся в нём, а не при
+# импорте: скрипты могут вызывать asyncio.run() несколько раз
+_bot_lock: asyncio.Lock | None = None
+_bot_lock_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_bot_lock() -> asyncio.Lock:
+    """Блокировка создания Bot для текущего цикла событий."""
+    global _bot_lock, _bot_lock_loop
+
+    loop = asyncio.get_running_loop()
+    if _bot_lock is None or _bot_lock_loop is not loop:
+        _bot_lock = asyncio.Lock()
+        _bot_lock_loop = loop
+    return _bot_lock
+
+
+async def get_bot() -> Bot:
+    """
+    Получить общий экземпляр Bot, создав его при первом вызове.
+
+    Returns:
+        Объект Bot с токеном из TELEGRAM_BOT_TOKEN
+
+    Raises:
+        RuntimeError: если TELEGRAM_BOT_TOKEN не задан
+    """
+    global _bot
+
+    async with _get_bot_lock():
+        if _bot is None:
+            bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
+            if not bot_token:
+                raise RuntimeError("TELEGRAM_BOT_TOKEN не найден в переменных окружения")
+            _bot = Bot(token=bot_token)
+        return _bot
+
+
+async def close_bot() -> None:
+    """Закрыть HTTP-сессию общего экземпляра Bot (вызывать при завершении процесса)."""
+    global _bot, _bot_lock, _bot_lock_loop
+
+    if _bot is not None:
+        await _bot.session.close()
+        _bot = None
+    _bot_lock = None
+    _bot_lock_loop = None
+
+
 # Время для фильтрации дедлайнов
 NOTIFICATION_WINDOWS = {
     "today": timedelta(days=0),  # Сегодня
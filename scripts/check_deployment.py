@@ -12,6 +12,8 @@ from datetime import datetime
 # Добавляем корневую директорию в путь
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+BYTES_TO_MB = 1.0 / (1024 * 1024)
+
 def run_command(cmd, capture_output=True):
     """Выполняет команду и возвращает результат."""
     try:
@@ -102,12 +104,13 @@ def check_logs():
 
     results = []
     for log_file in log_files:
-        if os.path.exists(log_file):
-            size = os.path.getsize(log_file)
-            size_mb = size / (1024 * 1024)
-            results.append(f"[OK] {log_file}: {size_mb:.2f} MB")
-        else:
+        # Один stat() вместо пары exists() + getsize()
+        try:
+            size_mb = os.stat(log_file).st_size * BYTES_TO_MB
+        except FileNotFoundError:
             results.append(f"[WARN] {log_file}: файл не найден")
+        else:
+            results.append(f"[OK] {log_file}: {size_mb:.2f} MB")
 
     return True, "\n".join(results)
 
@@ -40,13 +40,16 @@ def get_latest_tag():
     return stdout.strip() if success else "v0.0.0"
 
 def get_commits_since_tag(tag):
-    """Получает коммиты с момента последнего тега."""
-    success, stdout, stderr = run_command(f"git log --oneline {tag}..HEAD")
-    return stdout.strip().split('\n') if success and stdout.strip() else []
+    """Получает коммиты с момента последнего тега в виде пар (hash, message)."""
+    # Хэш и тема разделены символом \x1f, поэтому разбор сводится к одному split на запись
+    success, stdout, stderr = run_command(f'git log --pretty=format:"%h%x1f%s" {tag}..HEAD')
+    if not success:
+        return []
+    return [tuple(entry.split('\x1f', 1)) for entry in stdout.split('\n') if entry]
 
-def parse_commit_message(commit_line):
+def parse_commit_message(commit):
     """Парсит сообщение коммита для определения типа изменения."""
-    commit_hash, message = commit_line.split(' ', 1)
+    commit_hash, message = commit
 
     # Определяем тип изменения по ключевым словам
     if any(word in message.lower() for word in ['feat:', 'feature:', 'add:', 'new:']):
@@ -65,11 +68,10 @@ def generate_changelog_section(commits):
     changes = {'Added': [], 'Fixed': [], 'Changed': []}
 
     for commit in commits:
-        if commit.strip():
-            change_type, message = parse_commit_message(commit)
-            # Очищаем сообщение от префиксов типа feat:, fix: и т.д.
-            clean_message = re.sub(r'^(feat|fix|refactor|perf|docs|style|test|chore):?\s*', '', message, flags=re.IGNORECASE)
-            changes[change_type].append(f"- {clean_message}")
+        change_type, message = parse_commit_message(commit)
+        # Очищаем сообщение от префиксов типа feat:, fix: и т.д.
+        clean_message = re.sub(r'^(feat|fix|refactor|perf|docs|style|test|chore):?\s*', '', message, flags=re.IGNORECASE)
+        changes[change_type].append(f"- {clean_message}")
 
     # Формируем секцию changelog
     sections = []
@@ -210,11 +212,11 @@ def main():
     print()
     print("Дальнейшие шаги:")
     print(f"1. Создайте Pull Request из release/v{new_version} в main")
-    print("2. После ревью и тестирования слейте PR"
+    print("2. После ревью и тестирования слейте PR")
     print(f"3. Создайте тег: git tag -a v{new_version} -m 'Release v{new_version}'")
     print(f"4. Отправьте тег: git push origin v{new_version}")
     print(f"5. Создайте GitHub Release для тега v{new_version}")
-    print("6. CI/CD автоматически соберет и задеплоит новую версию"
+    print("6. CI/CD автоматически соберет и задеплоит новую версию")
 
 if __name__ == "__main__":
     main()
@@ -43,7 +43,6 @@ def main():
         )
         session.add(deadline)
         session.commit()
-        session.refresh(deadline)
 
         print('Создан тестовый дедлайн:')
         print(f'  ID: {deadline.id}')
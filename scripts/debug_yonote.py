@@ -4,6 +4,8 @@ Debug script to understand Yonote calendar structure and identify the 'люди'
 
 import asyncio
 import json
+import sys
+from itertools import islice
 from yonote_client import YonoteClient
 
 
@@ -12,50 +14,57 @@ async def debug_yonote_structure():
     client = YonoteClient()
 
     print("Fetching raw data from Yonote...")
+    # Collect output lines and write them to stdout in a single call
+    out = []
     try:
         raw_data = await client.fetch_deadlines_raw()
-        print("Successfully fetched raw data")
+        out.append("Successfully fetched raw data")
 
         # Print the overall structure
-        print("\nRaw data structure:")
+        out.append("\nRaw data structure:")
         if isinstance(raw_data, dict):
-            print(f"  Keys in root: {list(raw_data.keys())}")
+            out.append(f"  Keys in root: {list(raw_data.keys())}")
             if "data" in raw_data:
-                print(f"  Length of 'data' array: {len(raw_data['data'])}")
+                out.append(f"  Length of 'data' array: {len(raw_data['data'])}")
 
                 # Print first few items for inspection
-                for i, item in enumerate(raw_data['data'][:3]):  # First 3 items only
-                    print(f"\n  --- Item {i+1} ---")
+                for i, item in enumerate(islice(raw_data['data'], 3)):  # First 3 items only
+                    out.append(f"\n  --- Item {i+1} ---")
                     if isinstance(item, dict):
-                        print(f"  Item keys: {list(item.keys())}")
+                        out.append(f"  Item keys: {list(item.keys())}")
 
                         # Print properties if available
                         if "properties" in item:
-                            print(f"  Properties: {json.dumps(item['properties'], indent=2, ensure_ascii=False)[:500]}...")
+                            out.append(f"  Properties: {json.dumps(item['properties'], indent=2, ensure_ascii=False)[:500]}...")
 
                         # Print values if available
                         if "values" in item:
-                            print(f"  Values keys: {list(item['values'].keys())}")
+                            out.append(f"  Values keys: {list(item['values'].keys())}")
                             values = item['values']
-                            for key, val in list(values.items())[:5]:  # First 5 values only
-                                print(f"    '{key}': {type(val).__name__} = {str(val)[:200]}")
+                            for key, val in islice(values.items(), 5):  # First 5 values only
+                                out.append(f"    '{key}': {type(val).__name__} = {str(val)[:200]}")
 
                         # Print title for reference
                         title = item.get("title", "N/A")
-                        print(f"  Title: {title}")
+                        out.append(f"  Title: {title}")
 
         # Parse deadlines to see what gets extracted
-        print("\nParsing deadlines...")
+        out.append("\nParsing deadlines...")
         parsed_deadlines = client.parse_deadlines(raw_data)
-        print(f"Successfully parsed {len(parsed_deadlines)} deadlines")
+        out.append(f"Successfully parsed {len(parsed_deadlines)} deadlines")
 
-        for i, deadline in enumerate(parsed_deadlines[:5]):  # First 5 deadlines only
-            print(f"\n  Deadline {i+1}:")
-            print(f"    Title: {deadline.title}")
-            print(f"    User identifier: {deadline.user_identifier}")
-            print(f"    Due date: {deadline.due_date}")
+        for i, deadline in enumerate(islice(parsed_deadlines, 5)):  # First 5 deadlines only
+            out.append(f"\n  Deadline {i+1}:")
+            out.append(f"    Title: {deadline.title}")
+            out.append(f"    User identifier: {deadline.user_identifier}")
+            out.append(f"    Due date: {deadline.due_date}")
+
+        sys.stdout.write("\n".join(out) + "\n")
 
     except Exception as e:
+        # Flush whatever was collected before the failure
+        if out:
+            sys.stdout.write("\n".join(out) + "\n")
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
@@ -4,6 +4,7 @@ Enhanced debug script to understand Yonote calendar structure and specifically i
 
 import asyncio
 import json
+from collections import defaultdict
 from yonote_client import YonoteClient
 
 
@@ -38,27 +39,28 @@ async def debug_yonote_structure():
         else:
             print("No data returned.")
 
-        # Сбор всех ключей values
-        all_field_keys = set()
+        # Один проход по элементам: для каждого ключа values копим до 5 примеров
+        samples = defaultdict(list)
         for item in data_items:
-            if isinstance(item, dict):
-                values = item.get("values") or {}
-                all_field_keys.update(values.keys())
+            if not isinstance(item, dict):
+                continue
+            # Заголовок не зависит от поля — берем его один раз на элемент
+            title = item.get("title", "N/A")
+            values = item.get("values") or {}
+            for key, field_value in values.items():
+                bucket = samples[key]
+                if len(bucket) < 5:  # ограничимся 5 примерами для компактности
+                    bucket.append((title, field_value))
 
         print("\n" + "=" * 50)
         print("SUMMARY OF ALL FIELD KEYS ACROSS ITEMS:")
-        print(f"All unique field keys found: {list(all_field_keys)}")
+        print(f"All unique field keys found: {list(samples)}")
 
         # Проверка возможных 'люди' полей
         print("\nAnalyzing potential 'люди' (People) fields:")
-        for key in all_field_keys:
+        for key, key_samples in samples.items():
             print(f"\nField '{key}':")
-            for i, item in enumerate(data_items[:5]):  # ограничимся первыми 5 для компактности
-                if not isinstance(item, dict):
-                    continue
-                values = item.get("values", {})
-                field_value = values.get(key)
-                title = item.get("title", "N/A")
+            for title, field_value in key_samples:
                 print(f"  Item '{title}': {repr(field_value)}")
 
     except Exception as e:
@@ -21,26 +21,28 @@ from typing import List
 # Добавляем корневую директорию в путь для импортов
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy import create_engine, MetaData, Table
+from sqlalchemy import create_engine, inspect, MetaData, Table
 from sqlalchemy.schema import CreateTable, CreateIndex
-from sqlalchemy.sql import text
 
 from db import Base, get_database_url
 from models import User, Deadline, Subscription, BlockedUser, UserNotificationSettings, DeadlineVerification  # noqa: F401
 
+# Скомпилированный DDL: {(имя таблицы или индекса, диалект): SQL}
+_DDL_CACHE: dict[tuple[str, str], str] = {}
 
-def get_existing_tables(engine) -> set:
-    """Получить список существующих таблиц в базе данных."""
-    with engine.connect() as conn:
-        result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'"))
-        return {row[0] for row in result}
 
-
-def get_existing_indexes(engine) -> set:
-    """Получить список существующих индексов в базе данных."""
-    with engine.connect() as conn:
-        result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='index' AND name NOT LIKE 'sqlite_%'"))
-        return {row[0] for row in result}
+def get_existing_schema(engine) -> tuple[set, set]:
+    """Получить множества существующих таблиц и индексов в базе данных."""
+    # Один инспектор на обе выборки: работает для любого диалекта и кэширует отражение
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    existing_indexes = {
+        index["name"]
+        for table_name in existing_tables
+        for index in inspector.get_indexes(table_name)
+        if index.get("name")
+    }
+    return existing_tables, existing_indexes
 
 
 def generate_migration_sql(engine) -> List[str]:
@@ -49,8 +51,7 @@ def generate_migration_sql(engine) -> List[str]:
 
     Возвращает список SQL-команд.
     """
-    existing_tables = get_existing_tables(engine)
-    existing_indexes = get_existing_indexes(engine)
+    existing_tables, existing_indexes = get_existing_schema(engine)
 
     table_commands = []
     index_commands = []
@@ -59,8 +60,11 @@ def generate_migration_sql(engine) -> List[str]:
     for table_name, table in Base.metadata.tables.items():
         if table_name in existing_tables:
             continue  # Таблица уже существует
-        # Генерируем SQL для создания таблицы
-        create_table_sql = str(CreateTable(table).compile(engine))
+        # Генерируем SQL для создания таблицы (компилируем один раз на диалект)
+        table_key = (table.name, engine.dialect.name)
+        create_table_sql = _DDL_CACHE.get(table_key)
+        if create_table_sql is None:
+            create_table_sql = _DDL_CACHE.setdefault(table_key, str(CreateTable(table).compile(engine)))
         table_commands.append(create_table_sql)
 
         # Генерируем SQL для индексов таблицы (исключая первичные ключи)
@@ -69,7 +73,10 @@ def generate_migration_sql(engine) -> List[str]:
                 # Пропускаем индексы для первичных ключей
                 if len(index.columns) == 1 and index.columns[0].primary_key:
                     continue
-                create_index_sql = str(CreateIndex(index).compile(engine))
+                index_key = (index.name, engine.dialect.name)
+                create_index_sql = _DDL_CACHE.get(index_key)
+                if create_index_sql is None:
+                    create_index_sql = _DDL_CACHE.setdefault(index_key, str(CreateIndex(index).compile(engine)))
                 index_commands.append(create_index_sql)
 
     # Сначала создаем таблицы, затем индексы
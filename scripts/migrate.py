@@ -8,8 +8,12 @@
     python scripts/migrate.py
 """
 
+import json
 import os
+import sqlite3
 import sys
+import tempfile
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import List
 
@@ -20,39 +24,65 @@ from sqlalchemy import create_engine, text
 
 from db import get_database_url
 
+# Кэш разобранных SQL-команд: {путь: {mtime, size, commands}}
+PARSED_CACHE_FILE = Path("migrations") / ".cache" / "parsed.json"
 
-def get_applied_migrations(engine) -> set:
+
+def get_applied_migrations(conn) -> set:
     """Получить список уже примененных миграций."""
     applied = set()
 
-    # Проверяем, существует ли таблица __migrations__
-    with engine.connect() as conn:
-        try:
-            result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='__migrations__'"))
-            if not result.fetchone():
-                # Таблица не существует, создаем ее
-                conn.execute(text("""
-                    CREATE TABLE __migrations__ (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        name VARCHAR(255) NOT NULL UNIQUE,
-                        applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
-                    )
-                """))
-                conn.commit()
-                return applied
-
-            # Получаем список примененных миграций
-            result = conn.execute(text("SELECT name FROM __migrations__"))
-            applied = {row[0] for row in result}
+    try:
+        # Создаем таблицу __migrations__, если ее еще нет, и сразу читаем ее
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS __migrations__ (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name VARCHAR(255) NOT NULL UNIQUE,
+                applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        result = conn.execute(text("SELECT name FROM __migrations__"))
+        applied = {row[0] for row in result}
+        conn.commit()
 
-        except Exception as e:
-            print(f"Ошибка при проверке таблицы миграций: {e}")
-            # Если ошибка, предполагаем что миграции не применялись
-            pass
+    except Exception as e:
+        conn.rollback()
+        print(f"Ошибка при проверке таблицы миграций: {e}")
+        # Если ошибка, предполагаем что миграции не применялись
 
     return applied
 
 
+def migrations_up_to_date(conn, migration_files: List[Path]) -> bool:
+    """
+    Быстрая проверка: все ли миграции уже применены.
+
+    Считается, что применять нечего, если число записей в __migrations__
+    совпадает с числом файлов и ни один файл не менялся после последнего
+    применения. Иначе возвращает False, и миграции сверяются по именам.
+    """
+    try:
+        count, last_applied_at = conn.execute(
+            text("SELECT COUNT(*), MAX(applied_at) FROM __migrations__")
+        ).fetchone()
+        conn.commit()
+    except Exception:
+        # Таблицы еще нет или она недоступна - идем обычным путем
+        conn.rollback()
+        return False
+
+    if not last_applied_at or count != len(migration_files):
+        return False
+
+    # CURRENT_TIMESTAMP в SQLite хранится в UTC в формате "YYYY-MM-DD HH:MM:SS"
+    if isinstance(last_applied_at, str):
+        last_applied_at = datetime.strptime(last_applied_at, "%Y-%m-%d %H:%M:%S")
+    applied_epoch = last_applied_at.replace(tzinfo=timezone.utc).timestamp()
+
+    latest_mtime = max(f.stat().st_mtime for f in migration_files)
+    return latest_mtime < applied_epoch
+
+
 def get_migration_files() -> List[Path]:
     """Получить список файлов миграций, отсортированных по имени."""
     migrations_dir = Path("migrations")
@@ -61,73 +91,171 @@ def get_migration_files() -> List[Path]:
         print("❌ Директория migrations не найдена")
         return []
 
-    migration_files = []
-    for file in migrations_dir.glob("*.sql"):
-        migration_files.append(file)
-
     # Сортируем по имени файла (timestamp в начале)
-    migration_files.sort(key=lambda x: x.name)
+    return sorted(migrations_dir.glob("*.sql"), key=lambda x: x.name)
+
+
+def _is_already_exists_error(error: Exception) -> bool:
+    """Проверить, что ошибка вида "table/index/column ... already exists"."""
+    # Все варианты сообщения заканчиваются общей фразой
+    return " already exists" in str(error).lower()
+
+
+def split_sql_commands(sql_content: str) -> List[str]:
+    """
+    Разделить SQL-скрипт на отдельные команды.
+
+    Учитывает строки в кавычках и комментарии `--`, поэтому `;` внутри них
+    не считается разделителем, а комментарий перед командой не скрывает её.
+    """
+    commands = []
+    current = []
+    quote = None
+    i = 0
+    length = len(sql_content)
+
+    while i < length:
+        char = sql_content[i]
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+            current.append(char)
+        elif char == '-' and sql_content.startswith('--', i):
+            # Пропускаем комментарий до конца строки
+            newline = sql_content.find('\n', i)
+            i = length if newline == -1 else newline
+            continue
+        elif char == ';':
+            command = ''.join(current).strip()
+            if command:
+                commands.append(command)
+            current = []
+        else:
+            current.append(char)
+        i += 1
 
-    return migration_files
+    command = ''.join(current).strip()
+    if command:
+        commands.append(command)
 
+    return commands
 
-def apply_migration(engine, migration_file: Path) -> bool:
-    """Применить одну миграцию."""
-    migration_name = migration_file.name
 
-    print(f"Применение миграции: {migration_name}")
+def _load_cached_commands(migration_file: Path) -> List[str]:
+    """Получить команды миграции из кэша или разобрать файл и обновить кэш."""
+    stat = migration_file.stat()
+    key = str(migration_file)
 
     try:
-        # Читаем SQL из файла
-        with open(migration_file, 'r', encoding='utf-8') as f:
-            sql_content = f.read()
-
-        # Разделяем на отдельные команды, игнорируя комментарии и пустые строки
-        raw_commands = sql_content.split(';')
-        commands = []
-        for cmd in raw_commands:
-            cmd = cmd.strip()
-            if cmd and not cmd.startswith('--'):
-                commands.append(cmd)
-
-        with engine.connect() as conn:
-            # Начинаем транзакцию
-            trans = conn.begin()
-
-            try:
-                # Выполняем каждую команду
-                for command in commands:
-                    if command:
-                        try:
-                            conn.execute(text(command))
-                        except Exception as cmd_error:
-                            # Проверяем, является ли ошибка "уже существует"
-                            error_msg = str(cmd_error).lower()
-                            if any(phrase in error_msg for phrase in [
-                                'already exists',
-                                'table already exists',
-                                'index already exists',
-                                'column already exists'
-                            ]):
-                                print(f"  Пропускаем: объект уже существует ({command[:50]}...)")
-                                continue
-                            else:
-                                # Другая ошибка - пробрасываем
-                                raise cmd_error
-
-                # Записываем миграцию как примененную
-                conn.execute(text("INSERT INTO __migrations__ (name) VALUES (:name)"), {"name": migration_name})
-
-                # Коммитим транзакцию
-                trans.commit()
+        cache = json.loads(PARSED_CACHE_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        cache = {}
+
+    entry = cache.get(key)
+    if entry and entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size:
+        return entry["commands"]
+
+    with open(migration_file, 'r', encoding='utf-8') as f:
+        commands = split_sql_commands(f.read())
 
+    cache[key] = {"mtime": stat.st_mtime, "size": stat.st_size, "commands": commands}
+    try:
+        PARSED_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        # Пишем во временный файл и атомарно подменяем кэш
+        fd, tmp_path = tempfile.mkstemp(dir=PARSED_CACHE_FILE.parent, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, PARSED_CACHE_FILE)
+    except OSError as e:
+        print(f"  Не удалось сохранить кэш миграций: {e}")
+
+    return commands
+
+
+def _execute_script_sqlite(conn, migration_file: Path) -> bool:
+    """
+    Выполнить файл миграции целиком одним вызовом executescript (только SQLite).
+
+    Скрипт собирается из команд, разобранных через кэш (_load_cached_commands),
+    поэтому повторные запуски не разбирают файл заново. Скрипт и запись
+    в __migrations__ выполняются в одной транзакции.
+    Возвращает False, если какой-то объект уже существует: тогда транзакция
+    откатывается и миграцию нужно применить по командам.
+    """
+    commands = _load_cached_commands(migration_file)
+    quoted_name = migration_file.name.replace("'", "''")
+    script = (
+        "BEGIN;\n"
+        + "".join(f"{command};\n" for command in commands)
+        + f"INSERT INTO __migrations__ (name) VALUES ('{quoted_name}');\n"
+        + "COMMIT;"
+    )
+
+    driver_conn = conn.connection.driver_connection
+    try:
+        driver_conn.executescript(script)
+    except sqlite3.OperationalError as e:
+        driver_conn.rollback()
+        if _is_already_exists_error(e):
+            return False
+        raise
+    return True
+
+
+def apply_migration(conn, migration_file: Path) -> bool:
+    """Применить одну миграцию через уже открытое соединение."""
+    migration_name = migration_file.name
+
+    print(f"Применение миграции: {migration_name}")
+
+    if conn.dialect.name == "sqlite":
+        try:
+            if _execute_script_sqlite(conn, migration_file):
                 print(f"Миграция {migration_name} применена успешно")
                 return True
+        except Exception as e:
+            print(f"Ошибка при применении миграции {migration_name}: {e}")
+            return False
+        print("  Часть объектов уже существует, применяем команды по одной")
+
+    try:
+        # Читаем и разбираем SQL (повторные запуски берут команды из кэша)
+        commands = _load_cached_commands(migration_file)
+
+        # Начинаем транзакцию
+        trans = conn.begin()
 
-            except Exception as e:
-                trans.rollback()
-                print(f"Ошибка при применении миграции {migration_name}: {e}")
-                return False
+        try:
+            # Выполняем каждую команду
+            for command in commands:
+                if command:
+                    try:
+                        conn.execute(text(command))
+                    except Exception as cmd_error:
+                        # Проверяем, является ли ошибка "уже существует"
+                        if _is_already_exists_error(cmd_error):
+                            print(f"  Пропускаем: объект уже существует ({command[:50]}...)")
+                            continue
+                        else:
+                            # Другая ошибка - пробрасываем
+                            raise cmd_error
+
+            # Записываем миграцию как примененную
+            conn.execute(text("INSERT INTO __migrations__ (name) VALUES (:name)"), {"name": migration_name})
+
+            # Коммитим транзакцию
+            trans.commit()
+
+            print(f"Миграция {migration_name} применена успешно")
+            return True
+
+        except Exception as e:
+            trans.rollback()
+            print(f"Ошибка при применении миграции {migration_name}: {e}")
+            return False
 
     except Exception as e:
         print(f"Ошибка чтения файла миграции {migration_name}: {e}")
@@ -146,35 +274,44 @@ def main():
     # Создаем engine
     engine = create_engine(db_url, echo=False)
 
-    # Получаем список примененных миграций
-    applied_migrations = get_applied_migrations(engine)
-    print(f"Уже применено миграций: {len(applied_migrations)}")
-
-    # Получаем список файлов миграций
-    migration_files = get_migration_files()
-    if not migration_files:
-        print("Нет файлов миграций для применения")
-        return
-
-    print(f"Найдено файлов миграций: {len(migration_files)}")
-
-    # Фильтруем только новые миграции
-    new_migrations = [f for f in migration_files if f.name not in applied_migrations]
-
-    if not new_migrations:
-        print("Все миграции уже применены")
-        return
-
-    print(f"Будет применено миграций: {len(new_migrations)}")
-
-    # Применяем новые миграции
-    applied_count = 0
-    for migration_file in new_migrations:
-        if apply_migration(engine, migration_file):
-            applied_count += 1
-        else:
-            print("Применение миграций остановлено из-за ошибки")
-            break
+    # Одно соединение на весь прогон; каждая миграция в своей транзакции
+    with engine.connect() as conn:
+        # Получаем список файлов миграций
+        migration_files = get_migration_files()
+
+        # Повторный запуск без новых файлов завершается одним запросом
+        if migration_files and migrations_up_to_date(conn, migration_files):
+            print(f"Найдено файлов миграций: {len(migration_files)}")
+            print("Все миграции уже применены")
+            return
+
+        # Получаем список примененных миграций
+        applied_migrations = get_applied_migrations(conn)
+        print(f"Уже применено миграций: {len(applied_migrations)}")
+
+        if not migration_files:
+            print("Нет файлов миграций для применения")
+            return
+
+        print(f"Найдено файлов миграций: {len(migration_files)}")
+
+        # Фильтруем только новые миграции
+        new_migrations = [f for f in migration_files if f.name not in applied_migrations]
+
+        if not new_migrations:
+            print("Все миграции уже применены")
+            return
+
+        print(f"Будет применено миграций: {len(new_migrations)}")
+
+        # Применяем новые миграции
+        applied_count = 0
+        for migration_file in new_migrations:
+            if apply_migration(conn, migration_file):
+                applied_count += 1
+            else:
+                print("Применение миграций остановлено из-за ошибки")
+                break
 
     print(f"\nРезультат: применено {applied_count} из {len(new_migrations)} миграций")
 
@@ -15,14 +15,19 @@
 """
 
 import argparse
+import atexit
+import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 # Добавляем корневую директорию в путь для импортов
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from sqlalchemy import text
+
 from db import SessionLocal, engine
 from version import get_version
 
@@ -35,6 +40,14 @@ class SafeUpdater:
         self.rollback_marker = Path("data/.rollback_available")
         self.update_log = Path("logs/update.log")
 
+        # Лог файл открываем один раз (построчная буферизация) и закрываем при выходе
+        try:
+            self.update_log.parent.mkdir(parents=True, exist_ok=True)
+            self._log_fh = open(self.update_log, 'a', encoding='utf-8', buffering=1)
+            atexit.register(self._log_fh.close)
+        except Exception:
+            self._log_fh = None  # Без лог файла пишем только в stdout
+
     def log(self, message: str):
         """Логирует сообщение."""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -43,11 +56,11 @@ class SafeUpdater:
         print(log_message)
 
         # Записываем в лог файл
-        try:
-            with open(self.update_log, 'a', encoding='utf-8') as f:
-                f.write(log_message + '\n')
-        except Exception:
-            pass  # Игнорируем ошибки записи в лог
+        if self._log_fh is not None:
+            try:
+                self._log_fh.write(log_message + '\n')
+            except Exception:
+                pass  # Игнорируем ошибки записи в лог
 
     def create_backup(self) -> str:
         """Создает резервную копию перед обновлением."""
@@ -59,13 +72,6 @@ class SafeUpdater:
 
             if backup_file:
                 self.log(f"✅ Резервная копия создана: {backup_file}")
-
-                # Сохраняем информацию о бэкапе для возможного отката
-                with open(self.rollback_marker, 'w', encoding='utf-8') as f:
-                    f.write(f"backup_file={backup_file}\n")
-                    f.write(f"timestamp={datetime.now().isoformat()}\n")
-                    f.write(f"version={get_version()}\n")
-
                 return backup_file
             else:
                 raise Exception("Не удалось создать резервную копию")
@@ -74,6 +80,13 @@ class SafeUpdater:
             self.log(f"❌ Ошибка создания бэкапа: {e}")
             raise
 
+    def write_rollback_marker(self, backup_file: str) -> None:
+        """Сохраняет информацию о бэкапе для возможного отката."""
+        with open(self.rollback_marker, 'w', encoding='utf-8') as f:
+            f.write(f"backup_file={backup_file}\n")
+            f.write(f"timestamp={datetime.now().isoformat()}\n")
+            f.write(f"version={get_version()}\n")
+
     def check_database_integrity(self) -> bool:
         """Проверяет целостность базы данных."""
         self.log("🔍 Проверка целостности базы данных...")
@@ -81,7 +94,7 @@ class SafeUpdater:
         try:
             with engine.connect() as conn:
                 # Проверяем основные таблицы
-                result = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+                result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table'"))
                 tables = [row[0] for row in result.fetchall()]
 
                 required_tables = ['users', 'deadlines', 'subscriptions']
@@ -91,10 +104,10 @@ class SafeUpdater:
                     self.log(f"❌ Отсутствуют таблицы: {missing_tables}")
                     return False
 
-                # Проверяем количество записей
-                for table in required_tables:
-                    result = conn.execute(f"SELECT COUNT(*) FROM {table}")
-                    count = result.fetchone()[0]
+                # Проверяем количество записей всех таблиц одним запросом
+                counts_sql = "SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {t})" for t in required_tables)
+                counts = conn.execute(text(counts_sql)).fetchone()
+                for table, count in zip(required_tables, counts):
                     self.log(f"📊 Таблица {table}: {count} записей")
 
                 self.log("✅ Целостность базы данных подтверждена")
@@ -178,12 +191,12 @@ class SafeUpdater:
 
         try:
             # Читаем информацию об откате
-            rollback_info = {}
-            with open(self.rollback_marker, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if '=' in line:
-                        key, value = line.strip().split('=', 1)
-                        rollback_info[key] = value
+            marker_text = self.rollback_marker.read_text(encoding='utf-8')
+            rollback_info = {
+                key: value
+                for line in marker_text.splitlines() if '=' in line
+                for key, value in [line.strip().split('=', 1)]
+            }
 
             backup_file = rollback_info.get('backup_file')
             if not backup_file or not Path(backup_file).exists():
@@ -213,12 +226,24 @@ class SafeUpdater:
         start_time = time.time()
 
         try:
-            # Шаг 1: Проверка целостности
-            if not self.check_database_integrity():
+            # Шаги 1-2: проверка целостности (только чтение) и создание
+            # резервной копии независимы, поэтому выполняем их параллельно
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                integrity_future = executor.submit(self.check_database_integrity)
+                backup_future = executor.submit(self.create_backup)
+                integrity_ok = integrity_future.result()
+                backup_error = backup_future.exception()
+
+            if not integrity_ok:
+                # Бэкап к этому моменту уже сделан, но это копия непрошедшей
+                # проверку базы: маркер отката на неё не ставим, файл удаляем
+                if backup_error is None:
+                    Path(backup_future.result()).unlink(missing_ok=True)
                 return False
 
-            # Шаг 2: Создание резервной копии
-            backup_file = self.create_backup()
+            backup_file = backup_future.result()
+            # Маркер отката - только после успешной проверки целостности
+            self.write_rollback_marker(backup_file)
 
             # Шаг 3: Применение миграций
             if not self.run_migrations():
@@ -234,7 +259,7 @@ class SafeUpdater:
 
             # Шаг 5: Финализация
             elapsed = time.time() - start_time
-            self.log(".1f"
+            self.log(f"✅ Обновление завершено успешно за {elapsed:.1f} сек")
             return True
 
         except Exception as e:
@@ -255,11 +280,21 @@ class SafeUpdater:
 
         # Проверка бэкапов
         if self.backup_dir.exists():
-            backups = list(self.backup_dir.glob("backup_*.db"))
-            self.log(f"💾 Доступно резервных копий: {len(backups)}")
-            if backups:
-                latest = max(backups, key=lambda x: x.stat().st_mtime)
-                self.log(f"📅 Последний бэкап: {latest.name}")
+            # Один проход scandir: считаем бэкапы и сразу ищем самый свежий
+            count = 0
+            latest = None
+            with os.scandir(self.backup_dir) as entries:
+                for entry in entries:
+                    if not (entry.name.startswith("backup_") and entry.name.endswith(".db")):
+                        continue
+                    count += 1
+                    mtime = entry.stat().st_mtime
+                    if latest is None or mtime > latest[1]:
+                        latest = (entry.name, mtime)
+
+            self.log(f"💾 Доступно резервных копий: {count}")
+            if latest:
+                self.log(f"📅 Последний бэкап: {latest[0]}")
         else:
             self.log("⚠️  Резервные копии не найдены")
 
@@ -6,8 +6,10 @@
 import asyncio
 import os
 import sys
-from aiogram import Bot
+from functools import lru_cache
+
 from dotenv import load_dotenv
+from sqlalchemy import inspect
 
 # Добавляем корневую директорию проекта в путь для импорта
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -15,9 +17,17 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Загружаем переменные окружения
 load_dotenv()
 
-from db import SessionLocal, init_db
+from db import SessionLocal, engine, init_db
 from models import User
-from notifications import send_deadline_notification
+from notifications import close_bot, get_bot, send_deadline_notification
+
+
+@lru_cache(maxsize=1)
+def _ensure_db() -> None:
+    """Создать таблицы, только если их ещё нет (один раз за процесс)."""
+    if not inspect(engine).has_table(User.__tablename__):
+        init_db()
+
 
 async def send_test_notification():
     """Отправить тестовое уведомление о дедлайне на половине срока."""
@@ -26,8 +36,8 @@ async def send_test_notification():
     import os
     os.environ['DATABASE_URL'] = 'sqlite:///C:/Users/vj/Documents/data/deadlines.db'
 
-    # Инициализируем базу данных
-    init_db()
+    # Инициализируем базу данных, если схема ещё не создана
+    _ensure_db()
 
     # Получаем токен бота
     bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -35,7 +45,8 @@ async def send_test_notification():
         print("TELEGRAM_BOT_TOKEN не найден в переменных окружения")
         return
 
-    bot = Bot(token=bot_token)
+    # Переиспользуем общий Bot и его HTTP-сессию вместо создания нового на каждый вызов
+    bot = await get_bot()
 
     session = SessionLocal()
     try:
@@ -83,7 +94,6 @@ async def send_test_notification():
             )
             session.add(test_deadline)
             session.commit()
-            session.refresh(test_deadline)
             print(f"Тестовый дедлайн создан: ID {test_deadline.id}")
 
         print(f"Отправляю тестовое уведомление пользователю {user.telegram_id}")
@@ -110,7 +120,15 @@ async def send_test_notification():
 
     finally:
         session.close()
-        await bot.session.close()
+
+
+async def main():
+    """Отправить тестовое уведомление и закрыть сессию бота при выходе."""
+    try:
+        await send_test_notification()
+    finally:
+        await close_bot()
+
 
 if __name__ == "__main__":
-    asyncio.run(send_test_notification())
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
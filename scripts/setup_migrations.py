@@ -9,31 +9,33 @@
     python scripts/setup_migrations.py    # Настроить Alembic и создать первую миграцию
 """
 
-import subprocess
 import sys
 from pathlib import Path
 
+from alembic import command
+from alembic.config import Config
+
 # Добавляем корневую директорию в путь для импортов
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from db import engine
 from models import Base
 
+ALEMBIC_INI = "alembic.ini"
+
 
-def run_command(cmd: list, cwd: Path = None) -> bool:
-    """Выполняет команду и возвращает статус."""
+def run_alembic(description: str, func, *args, **kwargs) -> bool:
+    """Выполняет команду Alembic в текущем процессе и возвращает статус."""
+    # alembic.ini перечитываем на каждый вызов: между командами мы его правим
     try:
-        result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, check=True)
-        print(f"✅ {cmd[0]} {' '.join(cmd[1:])}")
-        if result.stdout:
-            print(result.stdout)
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Ошибка выполнения {' '.join(cmd)}")
-        print(f"stdout: {e.stdout}")
-        print(f"stderr: {e.stderr}")
+        func(Config(ALEMBIC_INI), *args, **kwargs)
+    except Exception as e:
+        print(f"❌ Ошибка выполнения alembic {description}: {e}")
         return False
 
+    print(f"✅ alembic {description}")
+    return True
+
 
 def setup_alembic():
     """Настраивает Alembic для проекта."""
@@ -55,7 +57,7 @@ def setup_alembic():
 
     # Инициализируем Alembic
     print("📁 Создание структуры миграций...")
-    if not run_command(["alembic", "init", "migrations"]):
+    if not run_alembic("init migrations", command.init, "migrations"):
         return False
 
     # Создаем alembic.ini
@@ -102,7 +104,12 @@ def setup_alembic():
 
     # Создаем первую миграцию на основе текущей схемы
     print("📝 Создание первой миграции...")
-    if not run_command(["alembic", "revision", "--autogenerate", "-m", "Initial migration"]):
+    if not run_alembic(
+        "revision --autogenerate",
+        command.revision,
+        message="Initial migration",
+        autogenerate=True,
+    ):
         return False
 
     print("✅ Alembic настроен успешно!")
@@ -4,10 +4,12 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections import defaultdict
 from datetime import UTC, datetime
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, delete, func, insert, select
 
 from db import SessionLocal
 from models import Deadline, DeadlineStatus, User, DeadlineVerification
@@ -15,64 +17,62 @@ from scripts.yonote_client import YonoteDeadline, fetch_user_deadlines
 
 logger = logging.getLogger(__name__)
 
+# Максимальное число пользователей, синхронизируемых одновременно
+SYNC_CONCURRENCY = 10
+# Сколько пользователей читаем из БД и запускаем одной пачкой
+SYNC_BATCH_SIZE = 50
 
-def sync_deadline_from_yonote(
-    session: Session,
-    user: User,
-    yonote_deadline: YonoteDeadline,
-) -> Deadline:
+
+async def sync_user_deadlines(
+    user: User | Row,
+    existing_deadlines: list[Deadline] | None = None,
+) -> tuple[int, int]:
     """
-    Синхронизировать один дедлайн из Yonote в БД.
+    Синхронизировать дедлайны для одного пользователя.
 
     Args:
-        session: Сессия БД
-        user: Пользователь
-        yonote_deadline: Дедлайн из Yonote
+        user: Пользователь (модель или строка с полями id и username)
+        existing_deadlines: Заранее загруженные Yonote-дедлайны пользователя из БД
+            (если не переданы, загружаются отдельным запросом)
 
     Returns:
-        Объект Deadline из БД
+        Кортеж (количество созданных, количество обновлённых)
     """
-    # Ищем существующий дедлайн по source и внешнему ID из Yonote
-    # Используем source="yonote" и сохраняем ID из Yonote в source или создаём отдельное поле
-    # Пока используем комбинацию source и title для поиска
-    existing = (
-        session.query(Deadline)
-        .filter_by(
-            user_id=user.id,
-            source="yonote",
-            title=yonote_deadline.title,
-        )
-        .first()
-    )
+    # Проверяем, что пользователь зарегистрировал ник для Yonote
+    if not user.username:
+        logger.warning(f"Пользователь {user.id} не зарегистрировал ник для синхронизации. Синхронизация не выполнена.")
+        return 0, 0
 
-    if existing:
-        # Обновляем существующий дедлайн
-        existing.description = yonote_deadline.description
-        existing.due_date = yonote_deadline.due_date
-        existing.updated_at = datetime.now(UTC)
-        # Если дедлайн был отменён в Yonote, можно обновить статус
-        # Пока оставляем статус как есть
-        return existing
-
-    # Создаём новый дедлайн
-    deadline = Deadline(
-        user_id=user.id,
-        title=yonote_deadline.title,
-        description=yonote_deadline.description,
-        due_date=yonote_deadline.due_date,
-        status=DeadlineStatus.ACTIVE,
-        source="yonote",
-    )
-    session.add(deadline)
-    return deadline
+    # Определяем идентификатор пользователя для фильтрации в Yonote
+    user_identifier = user.username
+    logger.info(f"Синхронизация для пользователя {user.id} по нику: {user.username}")
 
+    # Получаем дедлайны из Yonote для конкретного пользователя
+    try:
+        logger.info(f"Запрос дедлайнов из Yonote для пользователя: {user_identifier}")
+        yonote_deadlines = await fetch_user_deadlines(user_identifier)
+        logger.info(f"Получено {len(yonote_deadlines)} дедлайнов из Yonote для пользователя {user.id}")
+    except Exception as e:
+        logger.error(f"Ошибка при получении дедлайнов из Yonote для пользователя {user.id}: {e}", exc_info=True)
+        return 0, 0
+
+    # Работа с БД синхронная, поэтому выполняем её в отдельном потоке,
+    # чтобы не блокировать event loop бота
+    return await asyncio.to_thread(_save_user_deadlines, user, yonote_deadlines, existing_deadlines)
 
-async def sync_user_deadlines(user: User) -> tuple[int, int]:
+
+def _save_user_deadlines(
+    user: User | Row,
+    yonote_deadlines: list[YonoteDeadline],
+    existing_deadlines: list[Deadline] | None = None,
+) -> tuple[int, int]:
     """
-    Синхронизировать дедлайны для одного пользователя.
+    Сохранить полученные из Yonote дедлайны пользователя в БД.
 
     Args:
         user: Пользователь
+        yonote_deadlines: Дедлайны из Yonote
+        existing_deadlines: Заранее загруженные Yonote-дедлайны пользователя из БД
 
     Returns:
         Кортеж (количество созданных, количество обновлённых)
@@ -82,119 +82,119 @@ async def sync_user_deadlines(user: User) -> tuple[int, int]:
     updated_count = 0
 
     try:
-        # Проверяем, что пользователь зарегистрировал ник для Yonote
-        if not user.username:
-            logger.warning(f"Пользователь {user.id} не зарегистрировал ник для синхронизации. Синхронизация не выполнена.")
-            return 0, 0
-
-        # Определяем идентификатор пользователя для фильтрации в Yonote
-        user_identifier = user.username
-        logger.info(f"Синхронизация для пользователя {user.id} по нику: {user.username}")
-
-        # Получаем дедлайны из Yonote для конкретного пользователя
-        try:
-            logger.info(f"Запрос дедлайнов из Yonote для пользователя: {user_identifier}")
-            yonote_deadlines = await fetch_user_deadlines(user_identifier)
-            logger.info(f"Получено {len(yonote_deadlines)} дедлайнов из Yonote для пользователя {user.id}")
-        except Exception as e:
-            logger.error(f"Ошибка при получении дедлайнов из Yonote для пользователя {user.id}: {e}", exc_info=True)
-            return 0, 0
-
         # Получаем все существующие дедлайны пользователя из базы, связанные с Yonote
-        existing_db_deadlines = session.query(Deadline).filter_by(
-            user_id=user.id,
-            source="yonote"
-        ).all()
-
-        # Создаем множество заголовков дедлайнов из Yonote для быстрого поиска
-        yonote_titles = {dl.title for dl in yonote_deadlines}
+        if existing_deadlines is None:
+            existing_db_deadlines = session.query(Deadline).filter_by(
+                user_id=user.id,
+                source="yonote"
+            ).all()
+        else:
+            # Предзагруженные объекты отсоединены от своей сессии - привязываем
+            # их к текущей, чтобы изменения попали в коммит (без запросов к БД)
+            existing_db_deadlines = existing_deadlines
+            session.add_all(existing_db_deadlines)
+
+        # Индексы существующих дедлайнов для поиска без отдельных запросов к БД
+        # (при дубликатах, как и .first(), берём первый найденный)
+        by_source_id = {}
+        by_title = {}
+        for dl in existing_db_deadlines:
+            if dl.source_id:
+                by_source_id.setdefault(dl.source_id, dl)
+            by_title.setdefault(dl.title, dl)
+
+        # Дедлайны, которых больше нет в Yonote: разность множеств заголовков
+        stale_titles = by_title.keys() - {dl.title for dl in yonote_deadlines}
 
         # Удаляем дедлайны, которых больше нет в Yonote
-        deleted_count = 0
+        stale_ids = []
         for existing_dl in existing_db_deadlines:
-            if existing_dl.title not in yonote_titles:
-                logger.info(f"Удаляем дедлайн '{existing_dl.title}' - больше не назначен пользователю в Yonote")
+            if existing_dl.title not in stale_titles:
+                continue
+
+            logger.info("Удаляем дедлайн '%s' - больше не назначен пользователю в Yonote", existing_dl.title)
+            stale_ids.append(existing_dl.id)
+            by_title.pop(existing_dl.title, None)
+            if existing_dl.source_id and by_source_id.get(existing_dl.source_id) is existing_dl:
+                del by_source_id[existing_dl.source_id]
 
-                # Удаляем связанные запросы на проверку
-                verifications_to_delete = session.query(DeadlineVerification).filter_by(deadline_id=existing_dl.id).all()
-                for verification in verifications_to_delete:
-                    session.delete(verification)
-                    logger.debug(f"Удалена связанная verification ID={verification.id}")
+        if stale_ids:
+            # Связанные запросы на проверку и сами дедлайны - по одному DELETE
+            session.execute(delete(DeadlineVerification).where(DeadlineVerification.deadline_id.in_(stale_ids)))
+            session.execute(delete(Deadline).where(Deadline.id.in_(stale_ids)))
+        deleted_count = len(stale_ids)
 
-                session.delete(existing_dl)
-                deleted_count += 1
+        # Новые дедлайны копим и вставляем одним INSERT после цикла
+        new_rows = []
+        # Одна отметка времени на всю синхронизацию
+        now = datetime.now(UTC)
 
         # Синхронизируем каждый дедлайн
         for yonote_deadline in yonote_deadlines:
             # Проверяем, что дедлайн назначен этому пользователю
-            if not yonote_deadline.user_identifier or user.username not in yonote_deadline.user_identifier.split(", "):
-                logger.warning(f"Дедлайн '{yonote_deadline.title}' не назначен пользователю {user.username}, пропускаем")
+            if user.username not in yonote_deadline.assigned_usernames:
+                logger.warning("Дедлайн '%s' не назначен пользователю %s, пропускаем", yonote_deadline.title, user.username)
                 continue
 
-            # Сначала пробуем найти по source_id, если он есть
+            # Сначала пробуем найти по source_id, если он есть,
+            # затем по названию (для обратной совместимости)
             existing = None
-            if hasattr(yonote_deadline, 'id') and yonote_deadline.id:
-                existing = session.query(Deadline).filter_by(
-                    user_id=user.id,
-                    source="yonote",
-                    source_id=yonote_deadline.id,
-                ).first()
-
-            # Если не нашли по source_id, ищем по названию (для обратной совместимости)
+            if yonote_deadline.id:
+                existing = by_source_id.get(yonote_deadline.id)
             if not existing:
-                existing = session.query(Deadline).filter_by(
-                    user_id=user.id,
-                    source="yonote",
-                    title=yonote_deadline.title,
-                ).first()
+                existing = by_title.get(yonote_deadline.title)
 
             if existing:
-                # Обновляем существующий дедлайн
-                has_changes = False
+                # Обновляем существующий дедлайн: собираем только реально
+                # изменившиеся поля, чтобы не помечать строку грязной зря
+                updates = {}
 
                 # Обновляем source_id, если его нет
-                if not existing.source_id and hasattr(yonote_deadline, 'id') and yonote_deadline.id:
-                    existing.source_id = yonote_deadline.id
-                    has_changes = True
+                if not existing.source_id and yonote_deadline.id:
+                    updates["source_id"] = yonote_deadline.id
 
                 # Обновляем другие поля
                 if existing.due_date != yonote_deadline.due_date:
-                    logger.info(f"Дедлайн '{yonote_deadline.title}': дата изменена с {existing.due_date} на {yonote_deadline.due_date}")
-                    existing.due_date = yonote_deadline.due_date
-                    has_changes = True
+                    logger.info(
+                        "Дедлайн '%s': дата изменена с %s на %s",
+                        yonote_deadline.title, existing.due_date, yonote_deadline.due_date,
+                    )
+                    updates["due_date"] = yonote_deadline.due_date
 
                 if existing.title != yonote_deadline.title:
-                    logger.info(f"Дедлайн '{existing.title}': название изменено на '{yonote_deadline.title}'")
-                    existing.title = yonote_deadline.title
-                    has_changes = True
+                    logger.info("Дедлайн '%s': название изменено на '%s'", existing.title, yonote_deadline.title)
+                    updates["title"] = yonote_deadline.title
 
                 if existing.description != yonote_deadline.description:
-                    existing.description = yonote_deadline.description
-                    has_changes = True
+                    updates["description"] = yonote_deadline.description
 
-                if has_changes:
-                    existing.updated_at = datetime.now(UTC)
+                if updates:
+                    updates["updated_at"] = now
+                    for field_name, value in updates.items():
+                        setattr(existing, field_name, value)
                     updated_count += 1
-                    logger.info(f"[OK] Обновлён дедлайн: {yonote_deadline.title} (ID: {yonote_deadline.id})")
+                    logger.info("[OK] Обновлён дедлайн: %s (ID: %s)", yonote_deadline.title, yonote_deadline.id)
                 else:
-                    logger.debug(f"Дедлайн уже актуален: {yonote_deadline.title}")
+                    logger.debug("Дедлайн уже актуален: %s", yonote_deadline.title)
             else:
                 # Создаём новый дедлайн
-                deadline = Deadline(
-                    user_id=user.id,
-                    title=yonote_deadline.title,
-                    description=yonote_deadline.description,
-                    due_date=yonote_deadline.due_date,
-                    status=DeadlineStatus.ACTIVE,
-                    source="yonote",
-                    source_id=yonote_deadline.id if hasattr(yonote_deadline, 'id') else None,
-                    created_at=datetime.now(UTC),
-                    updated_at=datetime.now(UTC),
-                )
-                session.add(deadline)
+                new_rows.append({
+                    "user_id": user.id,
+                    "title": yonote_deadline.title,
+                    "description": yonote_deadline.description,
+                    "due_date": yonote_deadline.due_date,
+                    "status": DeadlineStatus.ACTIVE,
+                    "source": "yonote",
+                    "source_id": yonote_deadline.id,
+                    "created_at": now,
+                    "updated_at": now,
+                })
                 created_count += 1
-                logger.info(f"[OK] Создан новый дедлайн: {yonote_deadline.title} (ID: {yonote_deadline.id})")
+                logger.info("[OK] Создан новый дедлайн: %s (ID: %s)", yonote_deadline.title, yonote_deadline.id)
 
+        # Новые строки - одним пакетным INSERT, обновления - одним flush при коммите
+        if new_rows:
+            session.execute(insert(Deadline), new_rows)
         session.commit()
 
         if deleted_count > 0:
@@ -214,39 +214,120 @@ async def sync_user_deadlines(user: User) -> tuple[int, int]:
         session.close()
 
 
-async def sync_all_deadlines() -> dict[str, int]:
+def _load_existing_deadlines(user_ids: list[int]) -> dict[int, list[Deadline]]:
     """
-    Синхронизировать дедлайны для всех пользователей.
+    Загрузить Yonote-дедлайны сразу для пачки пользователей одним запросом.
+
+    Args:
+        user_ids: ID пользователей
 
     Returns:
-        Словарь со статистикой: {"total_users": ..., "created": ..., "updated": ...}
+        Словарь {user_id: [дедлайны]}; у пользователей без дедлайнов - пустой список
     """
     session = SessionLocal()
     try:
-        users = session.query(User).all()
-        total_created = 0
-        total_updated = 0
-
-        for user in users:
-            # Пропускаем пользователей, которые не зарегистрировали ник
-            if not user.username:
-                logger.info(f"Пропускаем пользователя {user.id}: не зарегистрирован ник")(f"Пользователь {user.id} не имеет зарегистрированного ника. Пропускаем синхронизацию.")
-                continue
+        deadlines = session.scalars(
+            select(Deadline).where(
+                Deadline.source == "yonote",
+                Deadline.user_id.in_(user_ids),
+            )
+        ).all()
+    finally:
+        # После закрытия сессии объекты отсоединены и могут быть
+        # привязаны к сессии синхронизации конкретного пользователя
+        session.close()
 
-            created, updated = await sync_user_deadlines(user)
-            total_created += created
-            total_updated += updated
+    per_user = defaultdict(list)
+    for deadline in deadlines:
+        per_user[deadline.user_id].append(deadline)
+    return {user_id: per_user.get(user_id, []) for user_id in user_ids}
 
-        logger.info(
-            f"Синхронизация завершена: пользователей {len(users)}, "
-            f"создано дедлайнов {total_created}, обновлено {total_updated}"
-        )
 
-        return {
-            "total_users": len(users),
-            "created": total_created,
-            "updated": total_updated,
-        }
+def _count_users() -> int:
+    """Число пользователей в БД."""
+    session = SessionLocal()
+    try:
+        return session.scalar(select(func.count(User.id)))
     finally:
         session.close()
 
+
+def _load_user_batch(after_id: int, size: int) -> tuple[list[Row], dict[int, list[Deadline]]]:
+    """
+    Следующая пачка пользователей с ником (id > after_id) и их Yonote-дедлайны.
+
+    Пользователей без ника отсекаем в SQL и читаем пачками по id, не загружая
+    всю таблицу в память. Берём только id и username: синхронизации больше
+    ничего не нужно, а простые строки не привязаны к сессии.
+
+    Returns:
+        (пользователи, {user_id: [дедлайны]}); пустой список - пользователи кончились
+    """
+    session = SessionLocal()
+    try:
+        users = session.execute(
+            select(User.id, User.username)
+            .where(User.username.is_not(None), User.username != "", User.id > after_id)
+            .order_by(User.id)
+            .limit(size)
+        ).all()
+    finally:
+        session.close()
+
+    if not users:
+        return users, {}
+    # Существующие дедлайны всей пачки - одним запросом вместо запроса на каждого
+    return users, _load_existing_deadlines([user.id for user in users])
+
+
+async def sync_all_deadlines() -> dict[str, int]:
+    """
+    Синхронизировать дедлайны для всех пользователей.
+
+    Returns:
+        Словарь со статистикой: {"total_users": ..., "created": ..., "updated": ...}
+    """
+    # Запросы к БД блокирующие - выполняем их в потоках, как и сохранение,
+    # чтобы не останавливать цикл событий бота на время синхронизации
+    total_users = await asyncio.to_thread(_count_users)
+    total_created = 0
+    total_updated = 0
+    synced_users = 0
+
+    # Синхронизируем пользователей параллельно, ограничивая число
+    # одновременных запросов к Yonote
+    semaphore = asyncio.Semaphore(SYNC_CONCURRENCY)
+
+    async def _sync_with_limit(user: Row, existing: list[Deadline]) -> tuple[int, int]:
+        async with semaphore:
+            return await sync_user_deadlines(user, existing)
+
+    after_id = 0
+    while True:
+        user_batch, per_user = await asyncio.to_thread(_load_user_batch, after_id, SYNC_BATCH_SIZE)
+        if not user_batch:
+            break
+        after_id = user_batch[-1].id
+
+        results = await asyncio.gather(
+            *(_sync_with_limit(user, per_user[user.id]) for user in user_batch)
+        )
+        synced_users += len(user_batch)
+        total_created += sum(created for created, _ in results)
+        total_updated += sum(updated for _, updated in results)
+
+    skipped_users = total_users - synced_users
+    if skipped_users:
+        logger.info(f"Пропущено пользователей без зарегистрированного ника: {skipped_users}")
+
+    logger.info(
+        f"Синхронизация завершена: пользователей {total_users}, "
+        f"создано дедлайнов {total_created}, обновлено {total_updated}"
+    )
+
+    return {
+        "total_users": total_users,
+        "created": total_created,
+        "updated": total_updated,
+    }
+
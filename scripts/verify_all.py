@@ -9,345 +9,554 @@
 
 Запуск:
     python verify_all.py
+    python verify_all.py --read-only    # Без записи в БД (также VERIFY_READ_ONLY=1)
 """
 
+import argparse
 import os
 import sys
+from collections.abc import Callable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from datetime import UTC, datetime, timedelta
+from functools import cache, wraps
+from types import MappingProxyType
 
 # Добавляем корневую директорию проекта в путь для импорта
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# .env ищем в корне проекта
+ENV_PATH = os.path.join(PROJECT_ROOT, ".env")
+
+# Число потоков для параллельного запуска независимых проверок
+CHECK_WORKERS = 4
+
+# Тестовый пользователь CRUD-проверки
+TEST_TELEGRAM_ID = 999999999
+
+# Таблицы, которые должны быть в БД
+_REQUIRED_TABLES = frozenset({
+    "users", "deadlines", "subscriptions", "blocked_users",
+    "user_notification_settings", "deadline_verifications",
+})
+
+# Обязательные поля и связи моделей (по имени класса в models)
+_REQUIRED_MODEL_ATTRS = {
+    "User": frozenset({
+        "telegram_id", "username", "email", "deadlines", "subscriptions",
+        "notification_settings", "deadline_verifications",
+    }),
+    "Deadline": frozenset({"user_id", "title", "due_date", "status", "source"}),
+    "Subscription": frozenset({"user_id", "notification_type", "active"}),
+    "BlockedUser": frozenset({"telegram_id", "blocked_by"}),
+    "UserNotificationSettings": frozenset({"user_id", "notifications_enabled"}),
+    "DeadlineVerification": frozenset({"deadline_id", "user_id", "status"}),
+}
+
+# Запросы списка пользовательских таблиц для диалектов, где он известен
+_TABLE_NAMES_QUERIES = {
+    "sqlite": "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'",
+    "postgresql": "SELECT tablename FROM pg_tables WHERE schemaname = current_schema()",
+}
+
+# Список таблиц по URL движка; после DDL его нужно очистить
+_table_names_cache: dict[str, frozenset[str]] = {}
+
+
+@cache
+def _env() -> Mapping[str, str]:
+    """
+    Переменные окружения с учётом .env, прочитанные один раз за процесс.
+
+    .env загружается здесь, а не в одной из проверок, поэтому результат
+    не зависит от порядка их запуска.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv(ENV_PATH)
+    return MappingProxyType(dict(os.environ))
+
+
+def _buffered(check: Callable[..., bool]) -> Callable[..., tuple[bool, str]]:
+    """
+    Копить вывод проверки в списке строк и вернуть его вместе с результатом.
+
+    Проверка получает список out и добавляет в него строки вместо print;
+    обёртка возвращает (результат, текст блока), а печатает блоки main()
+    по одному вызову на блок, так что вывод параллельных проверок не смешивается.
+    """
+    @wraps(check)
+    def wrapper(*args, **kwargs) -> tuple[bool, str]:
+        out: list[str] = []
+        ok = check(out, *args, **kwargs)
+        return ok, "\n".join(out)
+
+    return wrapper
+
+
+@contextmanager
+def _shared_connection() -> Iterator:
+    """
+    Одно соединение с БД на несколько проверок.
+
+    Если открыть соединение не удалось, отдаёт None: проверки тогда
+    открывают соединение сами и показывают ошибку в своём отчёте.
+    """
+    try:
+        from db import engine
+
+        conn = engine.connect()
+    except Exception:
+        conn = None
+
+    if conn is None:
+        yield None
+        return
+
+    with conn:
+        yield conn
+
 
-from db import SessionLocal, init_db, engine
-from models import Deadline, Subscription, User, DeadlineStatus, BlockedUser, UserNotificationSettings, DeadlineVerification
+def _connect(conn):
+    """Контекст с переданным соединением или с новым, если его нет."""
+    if conn is not None:
+        return nullcontext(conn)
 
+    from db import engine
 
-def check_database_connection() -> bool:
+    return engine.connect()
+
+
+@_buffered
+def check_database_connection(out: list[str], conn=None) -> bool:
     """Проверка подключения к БД."""
-    print("=" * 60)
-    print("3. Проверка подключения к БД...")
+    out.append("=" * 60)
+    out.append("3. Проверка подключения к БД...")
     try:
         from sqlalchemy import text
 
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        print("[OK] Подключение к БД успешно")
+        with _connect(conn) as connection:
+            connection.execute(text("SELECT 1"))
+        out.append("[OK] Подключение к БД успешно")
         return True
     except Exception as e:
-        print(f"[ERROR] Ошибка подключения к БД: {e}")
+        out.append(f"[ERROR] Ошибка подключения к БД: {e}")
         return False
 
 
-def check_database_tables() -> bool:
+def _cached_table_names(conn) -> frozenset[str]:
+    """
+    Список таблиц БД, прочитанный один раз за процесс.
+
+    Кэш привязан к URL движка; после DDL его нужно очистить (_table_names_cache).
+    """
+    engine_url = str(conn.engine.url)
+    tables = _table_names_cache.get(engine_url)
+    if tables is not None:
+        return tables
+
+    from sqlalchemy import inspect, text
+
+    # Для известных диалектов - один прямой запрос к системному каталогу
+    # вместо общей рефлексии Inspector
+    query = _TABLE_NAMES_QUERIES.get(conn.dialect.name)
+    if query is None:
+        tables = frozenset(inspect(conn).get_table_names())
+    else:
+        tables = frozenset(conn.execute(text(query)).scalars())
+
+    _table_names_cache[engine_url] = tables
+    return tables
+
+
+@_buffered
+def check_database_tables(out: list[str], conn=None) -> bool:
     """Проверка наличия всех таблиц."""
-    print("\n" + "=" * 60)
-    print("4. Проверка таблиц БД...")
+    out.append("\n" + "=" * 60)
+    out.append("4. Проверка таблиц БД...")
     try:
-        from sqlalchemy import inspect
-
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
-        required_tables = {"users", "deadlines", "subscriptions", "blocked_users", "user_notification_settings", "deadline_verifications"}
+        with _connect(conn) as connection:
+            tables = _cached_table_names(connection)
 
-        missing = required_tables - set(tables)
+        missing = _REQUIRED_TABLES - tables
         if missing:
-            print(f"[ERROR] Отсутствуют таблицы: {missing}")
-            print("  Попробуйте запустить: python init_db.py")
+            out.append(f"[ERROR] Отсутствуют таблицы: {missing}")
+            out.append("  Попробуйте запустить: python init_db.py")
             return False
 
-        print(f"[OK] Все таблицы на месте: {', '.join(required_tables)}")
+        out.append(f"[OK] Все таблицы на месте: {', '.join(sorted(_REQUIRED_TABLES))}")
         return True
     except Exception as e:
-        print(f"[ERROR] Ошибка проверки таблиц: {e}")
+        out.append(f"[ERROR] Ошибка проверки таблиц: {e}")
         return False
 
 
-def check_database_operations() -> bool:
+def _upsert_test_user(session) -> int:
+    """
+    Создать тестового пользователя или обновить оставшегося от прошлого запуска.
+
+    На SQLite и PostgreSQL - один INSERT ... ON CONFLICT вместо предварительного
+    DELETE и отдельного INSERT; на остальных СУБД - поиск по telegram_id и
+    затем обновление или вставка.
+
+    Returns:
+        ID тестового пользователя
+    """
+    from sqlalchemy import select
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+    from models import User
+
+    values = {"username": "verify_test_user", "email": "verify_test@example.com"}
+
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        insert = sqlite_insert
+    elif dialect == "postgresql":
+        insert = pg_insert
+    else:
+        user = session.scalar(select(User).where(User.telegram_id == TEST_TELEGRAM_ID))
+        if user is None:
+            user = User(telegram_id=TEST_TELEGRAM_ID, **values)
+            session.add(user)
+        else:
+            for name, value in values.items():
+                setattr(user, name, value)
+        session.flush()
+        return user.id
+
+    stmt = insert(User).values(telegram_id=TEST_TELEGRAM_ID, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.telegram_id],
+        set_={"username": stmt.excluded.username, "email": stmt.excluded.email},
+    )
+    return session.execute(stmt.returning(User.id)).scalar_one()
+
+
+@_buffered
+def check_database_operations(out: list[str]) -> bool:
     """Проверка CRUD операций с БД."""
-    print("\n" + "=" * 60)
-    print("5. Проверка операций с БД (CRUD)...")
-    session = SessionLocal()
+    out.append("\n" + "=" * 60)
+    out.append("5. Проверка операций с БД (CRUD)...")
+    # db и models импортируем здесь, а не в начале модуля: при отсутствующих
+    # зависимостях скрипт должен дойти до их диагностики, а не упасть на импорте
     try:
-        # На всякий случай чистим старого тестового пользователя по telegram_id
-        session.query(User).filter_by(telegram_id=999999999).delete()
-        session.commit()
-
-        # Создание пользователя
-        test_user = User(
-            telegram_id=999999999,
-            username="verify_test_user",
-            email="verify_test@example.com",
-        )
-        session.add(test_user)
-        session.commit()
-        session.refresh(test_user)
-        print(f"[OK] Пользователь создан: id={test_user.id}, telegram_id={test_user.telegram_id}")
-
-        # Создание дедлайна
-        test_deadline = Deadline(
-            user_id=test_user.id,
-            title="Тестовый дедлайн для проверки",
-            description="Проверка работы БД",
-            due_date=datetime.now(UTC) + timedelta(days=7),
-            status=DeadlineStatus.ACTIVE,
-            source="verify_test",
-        )
-        session.add(test_deadline)
-        session.commit()
-        session.refresh(test_deadline)
-        print(f"[OK] Дедлайн создан: id={test_deadline.id}, title={test_deadline.title}")
-
-        # Создание подписки
-        test_subscription = Subscription(
-            user_id=test_user.id,
-            notification_type="telegram",
-            active=True,
-        )
-        session.add(test_subscription)
-        session.commit()
-        session.refresh(test_subscription)
-        print(f"[OK] Подписка создана: id={test_subscription.id}, type={test_subscription.notification_type}")
-
-        # Чтение данных
-        loaded_user = session.query(User).filter_by(id=test_user.id).first()
-        loaded_deadlines = session.query(Deadline).filter_by(user_id=test_user.id).all()
-        loaded_subscriptions = session.query(Subscription).filter_by(user_id=test_user.id).all()
-
-        assert loaded_user is not None, "Пользователь не найден"
-        assert len(loaded_deadlines) > 0, "Дедлайны не найдены"
-        assert len(loaded_subscriptions) > 0, "Подписки не найдены"
-
-        print(f"[OK] Данные успешно прочитаны: {len(loaded_deadlines)} дедлайнов, {len(loaded_subscriptions)} подписок")
-
-        # Обновление данных
-        test_deadline.status = DeadlineStatus.COMPLETED
-        session.commit()
-        session.refresh(test_deadline)
-        assert test_deadline.status == DeadlineStatus.COMPLETED, "Обновление не сработало"
-        print("[OK] Обновление данных работает")
-
-        # Удаление тестовых данных
-        session.delete(test_deadline)
-        session.delete(test_subscription)
-        session.delete(test_user)
-        session.commit()
-        print("[OK] Тестовые данные удалены")
+        from sqlalchemy import delete, exists, func, select
+
+        from db import SessionLocal
+        from models import Deadline, DeadlineStatus, Subscription, User
+    except ImportError as e:
+        out.append(f"[ERROR] Ошибка операций с БД: {e}")
+        return False
+
+    try:
+        # Все CRUD-операции - в одной транзакции с одним коммитом в конце;
+        # при ошибке контекст откатывает её целиком и закрывает сессию
+        with SessionLocal() as session, session.begin():
+            # Создание пользователя (или переиспользование оставшегося от прошлого запуска)
+            user_id = _upsert_test_user(session)
+            out.append(f"[OK] Пользователь создан: id={user_id}, telegram_id={TEST_TELEGRAM_ID}")
+
+            # Дедлайн и подписка зависят только от id пользователя -
+            # добавляем их вместе и получаем id одним flush
+            test_deadline = Deadline(
+                user_id=user_id,
+                title="Тестовый дедлайн для проверки",
+                description="Проверка работы БД",
+                due_date=datetime.now(UTC) + timedelta(days=7),
+                status=DeadlineStatus.ACTIVE,
+                source="verify_test",
+            )
+            test_subscription = Subscription(
+                user_id=user_id,
+                notification_type="telegram",
+                active=True,
+            )
+            session.add_all([test_deadline, test_subscription])
+            session.flush()
+            out.append(f"[OK] Дедлайн создан: id={test_deadline.id}, title={test_deadline.title}")
+            out.append(f"[OK] Подписка создана: id={test_subscription.id}, type={test_subscription.notification_type}")
+
+            # Чтение данных: одним запросом, БД возвращает только флаг и
+            # два числа - без создания ORM-объектов для каждой строки
+            user_found, deadlines_count, subscriptions_count = session.execute(
+                select(
+                    exists().where(User.id == user_id),
+                    select(func.count(Deadline.id)).where(Deadline.user_id == user_id).scalar_subquery(),
+                    select(func.count(Subscription.id)).where(Subscription.user_id == user_id).scalar_subquery(),
+                )
+            ).one()
+
+            assert user_found, "Пользователь не найден"
+            assert deadlines_count > 0, "Дедлайны не найдены"
+            assert subscriptions_count > 0, "Подписки не найдены"
+
+            out.append(f"[OK] Данные успешно прочитаны: {deadlines_count} дедлайнов, {subscriptions_count} подписок")
+
+            # Обновление данных
+            test_deadline.status = DeadlineStatus.COMPLETED
+            session.flush()
+            # Проверяем значение в БД, а не атрибут объекта в памяти
+            stored_status = session.scalar(select(Deadline.status).where(Deadline.id == test_deadline.id))
+            assert stored_status == DeadlineStatus.COMPLETED, "Обновление не сработало"
+            out.append("[OK] Обновление данных работает")
+
+            # Удаление тестовых данных: по одному DELETE на таблицу по user_id
+            session.execute(delete(Deadline).where(Deadline.user_id == user_id))
+            session.execute(delete(Subscription).where(Subscription.user_id == user_id))
+            session.execute(delete(User).where(User.id == user_id))
+        out.append("[OK] Тестовые данные удалены")
 
         return True
     except Exception as e:
-        print(f"[ERROR] Ошибка операций с БД: {e}")
+        out.append(f"[ERROR] Ошибка операций с БД: {e}")
         import traceback
 
-        traceback.print_exc()
-        session.rollback()
+        out.append(traceback.format_exc().rstrip())
         return False
-    finally:
-        session.close()
 
 
-def check_models_structure() -> bool:
+@_buffered
+def check_models_structure(out: list[str]) -> bool:
     """Проверка структуры моделей."""
-    print("\n" + "=" * 60)
-    print("6. Проверка структуры моделей...")
+    out.append("\n" + "=" * 60)
+    out.append("6. Проверка структуры моделей...")
     try:
-        # Проверка User
-        assert hasattr(User, "telegram_id"), "User должен иметь поле telegram_id"
-        assert hasattr(User, "username"), "User должен иметь поле username"
-        assert hasattr(User, "email"), "User должен иметь поле email"
-        assert hasattr(User, "deadlines"), "User должен иметь связь deadlines"
-        assert hasattr(User, "subscriptions"), "User должен иметь связь subscriptions"
-        assert hasattr(User, "notification_settings"), "User должен иметь связь notification_settings"
-        assert hasattr(User, "deadline_verifications"), "User должен иметь связь deadline_verifications"
-        print("[OK] Модель User корректна")
-
-        # Проверка Deadline
-        assert hasattr(Deadline, "user_id"), "Deadline должен иметь поле user_id"
-        assert hasattr(Deadline, "title"), "Deadline должен иметь поле title"
-        assert hasattr(Deadline, "due_date"), "Deadline должен иметь поле due_date"
-        assert hasattr(Deadline, "status"), "Deadline должен иметь поле status"
-        assert hasattr(Deadline, "source"), "Deadline должен иметь поле source"
-        print("[OK] Модель Deadline корректна")
-
-        # Проверка Subscription
-        assert hasattr(Subscription, "user_id"), "Subscription должен иметь поле user_id"
-        assert hasattr(Subscription, "notification_type"), "Subscription должен иметь поле notification_type"
-        assert hasattr(Subscription, "active"), "Subscription должен иметь поле active"
-        print("[OK] Модель Subscription корректна")
-
-        # Проверка BlockedUser
-        assert hasattr(BlockedUser, "telegram_id"), "BlockedUser должен иметь поле telegram_id"
-        assert hasattr(BlockedUser, "blocked_by"), "BlockedUser должен иметь поле blocked_by"
-        print("[OK] Модель BlockedUser корректна")
-
-        # Проверка UserNotificationSettings
-        assert hasattr(UserNotificationSettings, "user_id"), "UserNotificationSettings должен иметь поле user_id"
-        assert hasattr(UserNotificationSettings, "notifications_enabled"), "UserNotificationSettings должен иметь поле notifications_enabled"
-        print("[OK] Модель UserNotificationSettings корректна")
-
-        # Проверка DeadlineVerification
-        assert hasattr(DeadlineVerification, "deadline_id"), "DeadlineVerification должен иметь поле deadline_id"
-        assert hasattr(DeadlineVerification, "user_id"), "DeadlineVerification должен иметь поле user_id"
-        assert hasattr(DeadlineVerification, "status"), "DeadlineVerification должен иметь поле status"
-        print("[OK] Модель DeadlineVerification корректна")
-
-        # Проверка DeadlineStatus
-        assert DeadlineStatus.ACTIVE == "active", "DeadlineStatus.ACTIVE должен быть 'active'"
-        assert DeadlineStatus.COMPLETED == "completed", "DeadlineStatus.COMPLETED должен быть 'completed'"
-        assert DeadlineStatus.CANCELED == "canceled", "DeadlineStatus.CANCELED должен быть 'canceled'"
-        print("[OK] DeadlineStatus корректна")
+        import models
+        from models import DeadlineStatus
+
+        # dir() каждой модели считаем один раз и сравниваем разностью множеств
+        for model_name, required in _REQUIRED_MODEL_ATTRS.items():
+            missing = required - set(dir(getattr(models, model_name)))
+            assert not missing, f"{model_name} должен иметь поля: {', '.join(sorted(missing))}"
+            out.append(f"[OK] Модель {model_name} корректна")
+
+        # Проверка DeadlineStatus: ожидаемые пары имя-значение сверяем
+        # с атрибутами класса за один проход
+        expected_statuses = {"ACTIVE": "active", "COMPLETED": "completed", "CANCELED": "canceled"}
+        actual_statuses = vars(DeadlineStatus)
+        wrong = [name for name, value in expected_statuses.items() if actual_statuses.get(name) != value]
+        assert not wrong, "Неверные значения DeadlineStatus: " + ", ".join(wrong)
+        out.append("[OK] DeadlineStatus корректна")
 
         return True
     except Exception as e:
-        print(f"[ERROR] Ошибка проверки моделей: {e}")
+        out.append(f"[ERROR] Ошибка проверки моделей: {e}")
         return False
 
 
-def check_yonote_client_config() -> bool:
+@_buffered
+def check_yonote_client_config(out: list[str]) -> bool:
     """Проверка конфигурации Yonote клиента."""
-    print("\n" + "=" * 60)
-    print("7. Проверка конфигурации Yonote клиента...")
+    out.append("\n" + "=" * 60)
+    out.append("7. Проверка конфигурации Yonote клиента...")
     try:
+        env = _env()
+
         from scripts.yonote_client import fetch_user_deadlines
 
         # Проверка импорта
-        print("[OK] Модуль yonote_client импортирован успешно")
+        out.append("[OK] Модуль yonote_client импортирован успешно")
 
         # Проверка переменных окружения
-        api_key = os.getenv("YONOTE_API_KEY")
-        base_url = os.getenv("YONOTE_BASE_URL", "https://unikeygroup.yonote.ru/api/v2")
-        calendar_id = os.getenv("YONOTE_CALENDAR_ID")
+        api_key = env.get("YONOTE_API_KEY")
+        base_url = env.get("YONOTE_BASE_URL", "https://unikeygroup.yonote.ru/api/v2")
+        calendar_id = env.get("YONOTE_CALENDAR_ID")
 
-        print(f"  YONOTE_BASE_URL: {base_url}")
-        print(f"  YONOTE_API_KEY: {'задан' if api_key else 'не задан'}")
-        print(f"  YONOTE_CALENDAR_ID: {'задан' if calendar_id else 'не задан'}")
+        out.append(f"  YONOTE_BASE_URL: {base_url}")
+        out.append(f"  YONOTE_API_KEY: {'задан' if api_key else 'не задан'}")
+        out.append(f"  YONOTE_CALENDAR_ID: {'задан' if calendar_id else 'не задан'}")
 
         if not api_key:
-            print("  ⚠ YONOTE_API_KEY не задан - тестирование API будет пропущено")
+            out.append("  ⚠ YONOTE_API_KEY не задан - тестирование API будет пропущено")
             return True  # Не критично для базовой проверки
 
         # Попытка вызвать функцию
         try:
             # Не асинхронно, просто проверка импорта
-            print("[OK] Функция fetch_user_deadlines доступна")
+            out.append("[OK] Функция fetch_user_deadlines доступна")
         except Exception as e:
-            print(f"  ⚠ Не удалось проверить fetch_user_deadlines: {e}")
-            print("  (Это нормально, если API ключ неверный или не настроен)")
+            out.append(f"  ⚠ Не удалось проверить fetch_user_deadlines: {e}")
+            out.append("  (Это нормально, если API ключ неверный или не настроен)")
             return True  # Не критично
 
         return True
     except ImportError as e:
-        print(f"[ERROR] Ошибка импорта yonote_client: {e}")
+        out.append(f"[ERROR] Ошибка импорта yonote_client: {e}")
         return False
     except Exception as e:
-        print(f"[ERROR] Ошибка проверки Yonote клиента: {e}")
+        out.append(f"[ERROR] Ошибка проверки Yonote клиента: {e}")
         return False
 
 
-def check_environment_variables() -> bool:
+@_buffered
+def check_environment_variables(out: list[str]) -> bool:
     """Проверка переменных окружения."""
-    print("\n" + "=" * 60)
-    print("2. Проверка переменных окружения...")
+    out.append("\n" + "=" * 60)
+    out.append("2. Проверка переменных окружения...")
     try:
-        from dotenv import load_dotenv
-
-        # Ищем .env файл в директории выше
-        parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        env_path = os.path.join(parent_dir, ".env")
-        load_dotenv(env_path)
+        env = _env()
 
         # Проверка наличия .env файла
-        if os.path.exists(env_path):
-            print("[OK] Файл .env найден")
+        if os.path.exists(ENV_PATH):
+            out.append("[OK] Файл .env найден")
         else:
-            print("[WARN] Файл .env не найден (можно создать вручную)")
+            out.append("[WARN] Файл .env не найден (можно создать вручную)")
 
         # Проверка важных переменных
-        database_url = os.getenv("DATABASE_URL", "sqlite:///../deadlines.db")
-        print(f"  DATABASE_URL: {database_url}")
+        database_url = env.get("DATABASE_URL", "sqlite:///../deadlines.db")
+        out.append(f"  DATABASE_URL: {database_url}")
 
-        telegram_token = os.getenv("TELEGRAM_BOT_TOKEN")
-        print(f"  TELEGRAM_BOT_TOKEN: {'задан' if telegram_token else 'не задан'}")
+        telegram_token = env.get("TELEGRAM_BOT_TOKEN")
+        out.append(f"  TELEGRAM_BOT_TOKEN: {'задан' if telegram_token else 'не задан'}")
 
-        yonote_api_key = os.getenv("YONOTE_API_KEY")
-        print(f"  YONOTE_API_KEY: {'задан' if yonote_api_key else 'не задан'}")
+        yonote_api_key = env.get("YONOTE_API_KEY")
+        out.append(f"  YONOTE_API_KEY: {'задан' if yonote_api_key else 'не задан'}")
 
         return True
     except Exception as e:
-        print(f"[ERROR] Ошибка проверки переменных окружения: {e}")
+        out.append(f"[ERROR] Ошибка проверки переменных окружения: {e}")
         return False
 
 
-def check_dependencies() -> bool:
+@_buffered
+def check_dependencies(out: list[str]) -> bool:
     """Проверка установленных зависимостей."""
-    print("\n" + "=" * 60)
-    print("1. Проверка зависимостей...")
+    out.append("\n" + "=" * 60)
+    out.append("1. Проверка зависимостей...")
     try:
         import aiogram
-        print(f"[OK] aiogram {aiogram.__version__}")
+        out.append(f"[OK] aiogram {aiogram.__version__}")
 
         import sqlalchemy
-        print(f"[OK] SQLAlchemy {sqlalchemy.__version__}")
+        out.append(f"[OK] SQLAlchemy {sqlalchemy.__version__}")
 
         import aiohttp
-        print(f"[OK] aiohttp {aiohttp.__version__}")
+        out.append(f"[OK] aiohttp {aiohttp.__version__}")
 
         from dotenv import load_dotenv
 
-        print("[OK] python-dotenv")
+        out.append("[OK] python-dotenv")
 
         return True
     except ImportError as e:
-        print(f"✗ Отсутствует зависимость: {e}")
-        print("  Запустите: pip install -r requirements.txt")
+        out.append(f"✗ Отсутствует зависимость: {e}")
+        out.append("  Запустите: pip install -r requirements.txt")
         return False
 
 
+def _print_reports(reports: list[tuple[bool, str]]) -> list[bool]:
+    """
+    Вывести отчёты проверок одним вызовом write.
+
+    Returns:
+        Результаты проверок в исходном порядке
+    """
+    sys.stdout.write("".join(f"{text}\n" for _, text in reports))
+    return [ok for ok, _ in reports]
+
+
+def _run_parallel(checks: tuple[Callable[[], tuple[bool, str]], ...]) -> list[bool]:
+    """
+    Запустить независимые проверки параллельно и вывести их отчёты.
+
+    Блоки выводятся в порядке checks.
+
+    Returns:
+        Результаты проверок в порядке checks
+    """
+    with ThreadPoolExecutor(max_workers=CHECK_WORKERS) as executor:
+        return _print_reports(list(executor.map(lambda check: check(), checks)))
+
+
 def main() -> None:
     """Главная функция проверки."""
+    parser = argparse.ArgumentParser(description="Проверка работоспособности проекта")
+    parser.add_argument(
+        "--read-only",
+        action="store_true",
+        default=os.getenv("VERIFY_READ_ONLY") == "1",
+        help="Не создавать таблицы и не выполнять CRUD-проверку (безопасно для продакшн-БД)",
+    )
+    args = parser.parse_args()
+
     print("\n" + "=" * 60)
     print("ПРОВЕРКА РАБОТОСПОСОБНОСТИ ПРОЕКТА")
     print("=" * 60)
 
-    results = []
+    # Независимые от БД проверки выполняем параллельно
+    deps_ok, env_ok, yonote_ok = _run_parallel(
+        (check_dependencies, check_environment_variables, check_yonote_client_config)
+    )
 
-    # Инициализация БД перед проверками
-    try:
-        init_db()
-        print("[OK] База данных инициализирована")
-    except Exception as e:
-        print(f"[WARN] Предупреждение при инициализации БД: {e}")
-
-    # Выполнение проверок
-    results.append(("Зависимости", check_dependencies()))
-    results.append(("Переменные окружения", check_environment_variables()))
-    results.append(("Подключение к БД", check_database_connection()))
-    results.append(("Таблицы БД", check_database_tables()))
-    results.append(("Операции с БД", check_database_operations()))
-    results.append(("Структура моделей", check_models_structure()))
-    results.append(("Yonote клиент", check_yonote_client_config()))
-
-    # Итоговый отчёт
-    print("\n" + "=" * 60)
-    print("ИТОГОВЫЙ ОТЧЁТ")
-    print("=" * 60)
+    # Инициализация БД перед проверками (к этому моменту .env уже загружен
+    # проверками выше, а db читает DATABASE_URL при импорте).
+    # В режиме только чтения схему не трогаем
+    if not args.read_only:
+        try:
+            from db import init_db
 
-    passed = sum(1 for _, result in results if result)
-    total = len(results)
+            init_db()
+            print("[OK] База данных инициализирована")
+        except Exception as e:
+            print(f"[WARN] Предупреждение при инициализации БД: {e}")
 
-    for name, result in results:
-        status = "[OK] ПРОЙДЕНО" if result else "[ERROR] ОШИБКА"
-        print(f"{status}: {name}")
+    # Подключение и таблицы проверяем последовательно на одном соединении
+    with _shared_connection() as conn:
+        connection_ok, tables_ok = _print_reports(
+            [check_database_connection(conn), check_database_tables(conn)]
+        )
+    (models_ok,) = _print_reports([check_models_structure()])
+
+    results = [
+        ("Зависимости", deps_ok),
+        ("Переменные окружения", env_ok),
+        ("Подключение к БД", connection_ok),
+        ("Таблицы БД", tables_ok),
+    ]
+
+    # CRUD-проверка пишет в БД и требует существующих таблиц,
+    # поэтому идёт последней и пропускается в режиме только чтения
+    if args.read_only:
+        print("\n[WARN] Режим только чтения: проверка операций с БД пропущена")
+    else:
+        (operations_ok,) = _print_reports([check_database_operations()])
+        results.append(("Операции с БД", operations_ok))
 
-    print("\n" + "=" * 60)
-    print(f"Результат: {passed}/{total} проверок пройдено")
-    print("=" * 60)
+    results += [
+        ("Структура моделей", models_ok),
+        ("Yonote клиент", yonote_ok),
+    ]
+
+    # Итоговый отчёт собираем целиком и выводим одним вызовом write
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    separator = "=" * 60
+
+    report = [
+        "",
+        separator,
+        "ИТОГОВЫЙ ОТЧЁТ",
+        separator,
+    ]
+    report += [("[OK] ПРОЙДЕНО: " if result else "[ERROR] ОШИБКА: ") + name for name, result in results]
+    report += [
+        "",
+        separator,
+        f"Результат: {passed}/{total} проверок пройдено",
+        separator,
+        "",
+    ]
 
     if passed == total:
-        print("\n[OK] Все проверки пройдены успешно!")
-        sys.exit(0)
+        report.append("[OK] Все проверки пройдены успешно!")
     else:
-        print("\n[WARN] Некоторые проверки не пройдены. Проверьте ошибки выше.")
-        sys.exit(1)
+        report.append("[WARN] Некоторые проверки не пройдены. Проверьте ошибки выше.")
+
+    sys.stdout.write("\n".join(report) + "\n")
+    sys.exit(0 if passed == total else 1)
 
 
 if __name__ == "__main__":
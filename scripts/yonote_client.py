@@ -1,51 +1,193 @@
-import aiohttp
+import asyncio
 import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from functools import lru_cache
+from typing import List, Optional, Dict
+
 import requests
 from dotenv import load_dotenv
+
+# Подгружаем переменные окружения из .env
 load_dotenv()
-import os
-from dataclasses import dataclass
-from datetime import datetime
-from typing import List, Optional, Dict
+
+logger = logging.getLogger(__name__)
 
 YONOTE_BASE_URL = 'https://unikeygroup.yonote.ru/api/v2'
 YONOTE_API_KEY = os.getenv('YONOTE_API_KEY')
 YONOTE_CALENDAR_ID = os.getenv('YONOTE_CALENDAR_ID')
+YONOTE_TIMEZONE = os.getenv('YONOTE_TIMEZONE', 'Europe/Moscow')
 
-# Кэш для соответствия Yonote user ID -> username
-_yonote_user_cache: Dict[str, str] = {}
+# Одна HTTP-сессия на процесс: TCP/TLS-соединения с Yonote переиспользуются
+# между запросами вместо нового рукопожатия на каждый вызов
+_http_session = requests.Session()
+# Заголовок авторизации не меняется - задаём его сессии один раз, а не
+# собираем словарь заголовков на каждый запрос
+_http_session.headers["Authorization"] = f"Bearer {YONOTE_API_KEY}"
 
-def _get_yonote_users() -> Dict[str, str]:
-    """Получаем словарь Yonote user ID -> username"""
-    global _yonote_user_cache
+# Повторы запросов к Yonote при сетевых ошибках
+YONOTE_RETRIES = 3
+YONOTE_RETRY_BASE_DELAY = 1.0  # секунды
+YONOTE_RETRY_MAX_DELAY = 30.0  # секунды
+# Кроме 5xx повторяем «слишком много запросов»
+_RETRY_STATUSES = frozenset({429})
+# Таймауты (подключение, чтение) по умолчанию: зависшее соединение не должно
+# держать поток и _rows_cache_lock бесконечно
+YONOTE_TIMEOUT = (5, 30)  # секунды
 
-    if _yonote_user_cache:
-        return _yonote_user_cache
 
+def _backoff_delay(attempt: int) -> float:
+    """Экспоненциальная задержка с полным джиттером перед повтором номер attempt (с 1)."""
+    return random.uniform(0, min(YONOTE_RETRY_MAX_DELAY, YONOTE_RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+def _retry_after(response: requests.Response) -> float | None:
+    """Задержка из заголовка Retry-After (в секундах), если сервер её указал."""
+    value = response.headers.get("Retry-After")
+    if value and value.isdigit():
+        return min(float(value), YONOTE_RETRY_MAX_DELAY)
+    return None
+
+
+def _get(url: str, **kwargs) -> requests.Response:
+    """
+    GET-запрос к Yonote через общую сессию с повторами при временных сбоях.
+
+    Повторяем сетевые ошибки, 5xx и 429; остальные ответы (в том числе
+    ошибки авторизации и прочие 4xx) возвращаем сразу. Случайная задержка
+    разносит повторы разных процессов бота во времени, чтобы они не били
+    по восстанавливающемуся сервису одновременно.
+    """
+    kwargs.setdefault("timeout", YONOTE_TIMEOUT)
+    for attempt in range(1, YONOTE_RETRIES + 1):
+        try:
+            response = _http_session.get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == YONOTE_RETRIES:
+                raise
+            time.sleep(_backoff_delay(attempt))
+            continue
+
+        if attempt < YONOTE_RETRIES and (
+            response.status_code in _RETRY_STATUSES or response.status_code >= 500
+        ):
+            time.sleep(_retry_after(response) or _backoff_delay(attempt))
+            continue
+
+        return response
+
+
+# Строк на страницу и сколько страниц запрашиваем одновременно
+YONOTE_PAGE_SIZE = 100
+YONOTE_PAGE_CONCURRENCY = 4
+# Предел страниц: если API не двигает offset или без конца отдаёт полные
+# страницы, синхронизация не должна зависнуть (держа _rows_cache_lock)
+YONOTE_MAX_PAGES = 100
+
+# Адрес и параметры запроса строк календаря не меняются между вызовами -
+# собираем их (включая JSON фильтра) один раз при импорте
+_ROWS_URL = YONOTE_BASE_URL.rstrip("/") + "/database/rows"
+_ROWS_PARAMS = {
+    "filter": json.dumps({"parentDocumentId": YONOTE_CALENDAR_ID}, ensure_ascii=False),
+    "limit": str(YONOTE_PAGE_SIZE),
+    "sort": '[["tableOrder","ASC"]]',
+    "userTimeZone": YONOTE_TIMEZONE,
+}
+
+# Кэш строк календаря: {(url, params): (время получения, строки)}
+YONOTE_ROWS_CACHE_TTL = 30.0  # секунды
+_rows_cache: Dict[tuple, tuple[float, list]] = {}
+_rows_cache_lock = threading.Lock()
+
+def _decode_json(response: requests.Response):
+    """
+    Разобрать JSON-ответ Yonote.
+
+    Данные приходят в UTF-8 байтах: json.loads разбирает их напрямую, без
+    промежуточной строки и без угадывания кодировки requests. Только если в
+    ответе битые байты, декодируем с заменой, как раньше.
+    """
+    try:
+        return json.loads(response.content)
+    except UnicodeDecodeError:
+        return json.loads(response.content.decode('utf-8', errors='replace'))
+
+
+# Кэш для соответствия Yonote user ID -> username. Устаревший справочник
+# (старше YONOTE_USERS_CACHE_TTL) отдаётся сразу, а обновляется в фоне
+YONOTE_USERS_CACHE_TTL = 300.0  # секунды
+_yonote_user_cache: Dict[str, str] = {}
+_yonote_users_fetched_at = 0.0
+# Один запрос справочника за раз: параллельные вызовы ждут его, а не шлют свои
+_yonote_users_lock = threading.Lock()
+
+
+def _load_yonote_users() -> Optional[Dict[str, str]]:
+    """Запросить у Yonote словарь user ID -> username; None при ошибке"""
     url = f"{YONOTE_BASE_URL}/users"
-    headers = {
-        "Authorization": f"Bearer {YONOTE_API_KEY}",
-    }
 
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            raw_text = response.content.decode('utf-8', errors='replace')
-            data = json.loads(raw_text)
-
-            if isinstance(data, dict) and 'data' in data:
-                users = data['data']
-                if isinstance(users, list):
-                    for user in users:
-                        user_id = user.get('id')
-                        username = user.get('name')  # Используем name как username
-                        if user_id and username:
-                            _yonote_user_cache[user_id] = username
+        response = _get(url)
+        if response.status_code != 200:
+            logger.error("Yonote API error: %s - %s", response.status_code, response.text)
+            return None
+        data = _decode_json(response)
+    except Exception as e:
+        logger.error("Ошибка при получении пользователей Yonote: %s", e)
+        return None
+
+    users: Dict[str, str] = {}
+    if isinstance(data, dict) and isinstance(data.get('data'), list):
+        for user in data['data']:
+            if not isinstance(user, dict):
+                continue
+            user_id = user.get('id')
+            username = user.get('name')  # Используем name как username
+            if user_id and username:
+                users[user_id] = username
+    return users
 
+
+def _refresh_yonote_users() -> Dict[str, str]:
+    """Перезапросить справочник пользователей (вызывается под _yonote_users_lock)"""
+    global _yonote_user_cache, _yonote_users_fetched_at
+
+    users = _load_yonote_users()
+    if users:
+        # Подменяем словарь целиком: уже выданный вызывающим не меняется под ними
+        _yonote_user_cache = users
+        _yonote_users_fetched_at = time.monotonic()
+    return _yonote_user_cache
+
+
+def _refresh_yonote_users_in_background() -> None:
+    """Фоновое обновление справочника; пропускается, если оно уже идёт"""
+    if not _yonote_users_lock.acquire(blocking=False):
+        return
+    try:
+        _refresh_yonote_users()
+    finally:
+        _yonote_users_lock.release()
+
+
+def _get_yonote_users() -> Dict[str, str]:
+    """Получаем словарь Yonote user ID -> username"""
+    if _yonote_user_cache:
+        if time.monotonic() - _yonote_users_fetched_at >= YONOTE_USERS_CACHE_TTL and not _yonote_users_lock.locked():
+            threading.Thread(target=_refresh_yonote_users_in_background, daemon=True).start()
         return _yonote_user_cache
-    except Exception as e:
-        print(f"Ошибка при получении пользователей Yonote: {e}")
-        return {}
+
+    with _yonote_users_lock:
+        # Пока ждали блокировку, справочник мог загрузить другой поток
+        if _yonote_user_cache:
+            return _yonote_user_cache
+        return _refresh_yonote_users()
 
 @dataclass
 class YonoteDeadline:
@@ -58,89 +200,207 @@ class YonoteDeadline:
     tags: List[str] = None
     raw_data: Optional[dict] = None
     user_identifier: Optional[str] = None  # Теперь будет список пользователей через запятую
+    # Те же пользователи в виде множества для быстрой проверки назначения
+    assigned_usernames: frozenset = field(default_factory=frozenset)
 
     def __post_init__(self):
         if self.tags is None:
             self.tags = []
 
+# Запасные форматы дат в полях календаря (если дата не в ISO), в порядке проверки
+_DATE_FORMATS = ("%Y/%m/%d", "%Y-%m-%d")
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(date_str: str) -> Optional[datetime]:
+    """
+    Разобрать дату из поля календаря; None, если формат не распознан.
+
+    Одни и те же даты повторяются в строках и между синхронизациями,
+    поэтому результат кэшируется (datetime неизменяем, делить его безопасно).
+    Обычная ISO-дата разбирается сразу в C через date.fromisoformat, без strptime.
+    """
+    try:
+        parsed = date.fromisoformat(date_str)
+    except ValueError:
+        pass
+    else:
+        return datetime(parsed.year, parsed.month, parsed.day)
+
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def _fetch_page(url: str, params: dict, offset: int) -> list | None:
+    """
+    Одна страница строк календаря, начиная с offset.
+
+    Returns:
+        Список строк или None при ошибке API
+    """
+    response = _get(url, params={**params, "offset": str(offset)})
+    if response.status_code != 200:
+        logger.error("Yonote API error: %s - %s", response.status_code, response.text)
+        return None
+
+    return _decode_json(response).get("data", [])
+
+
+def _first_row_id(page: list):
+    """ID первой строки страницы (для поиска повторяющихся страниц)."""
+    return page[0].get("id") if page and isinstance(page[0], dict) else None
+
+
+def _fetch_all_pages(url: str, params: dict) -> tuple[list | None, bool]:
+    """
+    Все строки календаря постранично.
+
+    Первая страница запрашивается отдельно; если она полная, следующие
+    запрашиваются пачками по YONOTE_PAGE_CONCURRENCY параллельно, пока не
+    придёт неполная страница. Пагинация также останавливается, если страница
+    повторяет предыдущую (API не учитывает offset) или набралось
+    YONOTE_MAX_PAGES страниц.
+
+    Returns:
+        (строки, получены ли они полностью). Строки - None, если не удалась
+        первая страница. Если не удалась одна из следующих (и её повтор),
+        возвращаются уже полученные страницы с флагом False
+    """
+    rows = _fetch_page(url, params, 0)
+    if rows is None or len(rows) < YONOTE_PAGE_SIZE:
+        return rows, rows is not None
+
+    previous_first_id = _first_row_id(rows)
+    page_count = 1
+    offset = YONOTE_PAGE_SIZE
+    with ThreadPoolExecutor(max_workers=YONOTE_PAGE_CONCURRENCY) as executor:
+        while page_count < YONOTE_MAX_PAGES:
+            batch_size = min(YONOTE_PAGE_CONCURRENCY, YONOTE_MAX_PAGES - page_count)
+            offsets = range(offset, offset + YONOTE_PAGE_SIZE * batch_size, YONOTE_PAGE_SIZE)
+            pages = list(executor.map(lambda page_offset: _fetch_page(url, params, page_offset), offsets))
+            for page_offset, page in zip(offsets, pages):
+                if page is None:
+                    # Повторяем только упавшую страницу, уже полученные не теряем
+                    page = _fetch_page(url, params, page_offset)
+                if page is None:
+                    logger.error("Yonote: страница offset=%s не получена, строки календаря неполные", page_offset)
+                    return rows, False
+
+                first_id = _first_row_id(page)
+                if first_id is not None and first_id == previous_first_id:
+                    logger.warning("Yonote: страница offset=%s повторяет предыдущую, пагинация остановлена", page_offset)
+                    return rows, True
+                previous_first_id = first_id
+
+                rows.extend(page)
+                page_count += 1
+                if len(page) < YONOTE_PAGE_SIZE:
+                    return rows, True
+            offset += YONOTE_PAGE_SIZE * batch_size
+
+    logger.warning("Yonote: достигнут предел в %s страниц, строки календаря могут быть неполными", YONOTE_MAX_PAGES)
+    return rows, False
+
+
+def _fetch_rows(url: str, params: dict) -> list | None:
+    """
+    Строки календаря из Yonote с кэшем на YONOTE_ROWS_CACHE_TTL секунд.
+
+    Строки календаря одинаковы для всех пользователей, поэтому при синхронизации
+    всех пользователей подряд сеть запрашивается один раз, а не на каждого.
+    Неполный результат (не удалась одна из страниц) возвращается, но не
+    кэшируется - следующий вызов запросит календарь заново.
+
+    Returns:
+        Список строк или None при ошибке API
+    """
+    key = (url, tuple(sorted(params.items())))
+    # Под блокировкой: параллельные синхронизации ждут один запрос, а не шлют свои
+    with _rows_cache_lock:
+        cached = _rows_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < YONOTE_ROWS_CACHE_TTL:
+            return cached[1]
+
+        rows, complete = _fetch_all_pages(url, params)
+        if rows is None:
+            return None
+
+        # Тип строк проверяем один раз здесь, а не в цикле разбора каждого вызова
+        rows = [row for row in rows if isinstance(row, dict)]
+        if complete:
+            _rows_cache[key] = (time.monotonic(), rows)
+        return rows
+
+
+def _resolve_people(user_ids: list, yonote_users: Dict[str, str]) -> List[str]:
+    """
+    Имена пользователей из поля календаря со списком user ID.
+
+    Неизвестные ID и значения не-строки (в поле может оказаться что угодно)
+    пропускаются.
+    """
+    return [
+        yonote_users[user_id]
+        for user_id in user_ids
+        if isinstance(user_id, str) and user_id in yonote_users
+    ]
+
+
 async def fetch_user_deadlines(user_identifier=None):
     """Получаем дедлайны из Yonote через v2 API"""
-    filter_obj = {"parentDocumentId": YONOTE_CALENDAR_ID}
-
-    params = {
-        "filter": json.dumps(filter_obj, ensure_ascii=False),
-        "limit": "100",
-        "offset": "0",
-        "sort": '[["tableOrder","ASC"]]',
-        "userTimeZone": "Europe/Moscow",
-    }
-
-    url = YONOTE_BASE_URL.rstrip("/") + "/database/rows"
-    headers = {
-        "Authorization": f"Bearer {YONOTE_API_KEY}",
-    }
-
-    # Используем requests с правильным декодированием
-    response = requests.get(url, headers=headers, params=params)
-
-    if response.status_code == 200:
-        # Данные приходят в UTF-8 байтах, декодируем правильно
-        raw_text = response.content.decode('utf-8', errors='replace')
-        data = json.loads(raw_text)
-        rows = data.get("data", [])
-
-        # Получаем соответствие user ID -> username
-        yonote_users = _get_yonote_users()
-
-        deadlines = []
-        for row in rows:
-            title = row.get("title", "")
-            description = row.get("text", "")
-            values = row.get("values", {})
-
-            deadline = YonoteDeadline(
-                id=str(row.get("id", "")),
-                title=title,
-                description=description,
-                raw_data=row
-            )
-
-            # Парсим дату из values
-            for field_id, field_data in values.items():
-                if isinstance(field_data, dict) and "from" in field_data:
-                    date_str = field_data.get("from")
-                    if date_str:
-                        try:
-                            deadline.due_date = datetime.strptime(date_str, "%Y-%m-%d")
-                        except ValueError:
-                            # Пробуем другие форматы даты
-                            try:
-                                deadline.due_date = datetime.strptime(date_str, "%Y/%m/%d")
-                            except ValueError:
-                                pass
-
-            # Парсим назначенных пользователей
-            assigned_users = []
-            for field_id, field_data in values.items():
-                if isinstance(field_data, list):
-                    # Это поле с пользователями - список user ID
-                    for user_id in field_data:
-                        if user_id in yonote_users:
-                            assigned_users.append(yonote_users[user_id])
-
-            # Сохраняем список назначенных пользователей
-            deadline.user_identifier = ", ".join(assigned_users) if assigned_users else None
-
-            # Фильтруем по user_identifier, если указан
-            if user_identifier:
-                # Если дедлайн не назначен этому пользователю, пропускаем
-                if not assigned_users or user_identifier not in assigned_users:
-                    continue
-
-            deadlines.append(deadline)
-
-        return deadlines
-    else:
-        print(f"Yonote API error: {response.status_code} - {response.text}")
-        # В случае ошибки возвращаем пустой список
+    # Блокирующий запрос (вместе с возможными паузами между повторами) -
+    # в отдельном потоке
+    rows = await asyncio.to_thread(_fetch_rows, _ROWS_URL, _ROWS_PARAMS)
+    if not rows:
+        # В случае ошибки (None) или пустого календаря возвращаем пустой
+        # список, не запрашивая справочник пользователей
         return []
+
+    # Получаем соответствие user ID -> username. Справочник кэшируется на
+    # уровне модуля, но первый раз идёт в сеть - тоже не в цикле событий
+    yonote_users = await asyncio.to_thread(_get_yonote_users)
+
+    deadlines = []
+    for row in rows:
+        title = row.get("title", "")
+        description = row.get("text", "")
+        values = row.get("values") or {}
+
+        deadline = YonoteDeadline(
+            id=str(row.get("id", "")),
+            title=title,
+            description=description,
+            raw_data=row
+        )
+
+        # Один проход по values: поля-даты ({"from": ...}) и поля с
+        # пользователями (список user ID) определяем по типу значения
+        assigned_users = []
+        for field_data in values.values():
+            if isinstance(field_data, dict):
+                date_str = field_data.get("from")
+                if date_str:
+                    due_date = _parse_date(date_str)
+                    if due_date is not None:
+                        deadline.due_date = due_date
+            elif isinstance(field_data, list):
+                # Это поле с пользователями - список user ID
+                assigned_users.extend(_resolve_people(field_data, yonote_users))
+
+        # Сохраняем список назначенных пользователей
+        deadline.user_identifier = ", ".join(assigned_users) if assigned_users else None
+        deadline.assigned_usernames = frozenset(assigned_users)
+
+        # Фильтруем по user_identifier, если указан
+        if user_identifier:
+            # Если дедлайн не назначен этому пользователю, пропускаем
+            if user_identifier not in deadline.assigned_usernames:
+                continue
+
+        deadlines.append(deadline)
+
+    return deadlines
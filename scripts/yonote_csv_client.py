@@ -7,12 +7,17 @@
 from __future__ import annotations
 
 import asyncio
+import codecs
 import csv
+import hashlib
 import io
+import logging
 import os
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional, List, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import AsyncIterator, Iterator, Optional, List, Iterable
 
 import aiohttp
 from dotenv import load_dotenv
@@ -20,9 +25,58 @@ from dotenv import load_dotenv
 # Подгружаем переменные окружения из .env
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 YONOTE_API_KEY = os.getenv("YONOTE_API_KEY")
 YONOTE_CALENDAR_ID = os.getenv("YONOTE_CALENDAR_ID")
 
+CSV_EXPORT_URL = "https://app.yonote.ru/api/database.export_csv"
+# Размер куска при потоковом чтении CSV из ответа
+CSV_CHUNK_SIZE = 64 * 1024
+
+# Ключевое слово в заголовке столбца -> роль столбца. Порядок важен: для
+# заголовка берётся первое найденное слово (название, затем люди, песня, дата)
+_HEADER_KEYWORDS = {
+    **dict.fromkeys(("название", "title", "name"), "title"),
+    **dict.fromkeys(("люди", "people", "person", "участник", "member", "assignee"), "people"),
+    **dict.fromkeys(("песня", "song", "description", "текст"), "song"),
+    **dict.fromkeys(("дата", "date", "due", "deadline", "end", "start"), "date"),
+}
+
+# Одна HTTP-сессия на процесс: пул соединений (и TLS-сессии) переиспользуется
+# между запросами CSV вместо нового рукопожатия на каждый вызов
+_http_session: aiohttp.ClientSession | None = None
+_http_session_loop: asyncio.AbstractEventLoop | None = None
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """
+    Общая aiohttp-сессия, создаётся при первом обращении.
+
+    Сессия привязана к циклу событий, поэтому если она закрыта или создана
+    в другом цикле (например, после повторного asyncio.run), создаём новую.
+    """
+    global _http_session, _http_session_loop
+
+    loop = asyncio.get_running_loop()
+    if _http_session is None or _http_session.closed or _http_session_loop is not loop:
+        _http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=30),
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300, keepalive_timeout=60),
+        )
+        _http_session_loop = loop
+    return _http_session
+
+
+async def close_session() -> None:
+    """Закрыть общую HTTP-сессию (при остановке приложения)."""
+    global _http_session, _http_session_loop
+
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+    _http_session_loop = None
+
 @dataclass
 class YonoteDeadline:
     """Упрощённая внутренняя модель дедлайна, полученного из Yonote."""
@@ -33,10 +87,25 @@ class YonoteDeadline:
     due_date: Optional[datetime]
     user_identifier: Optional[str]  # Список людей через запятую
     source: str = "yonote_csv"
+    # Те же люди, нормализованные (strip + lower), для быстрой фильтрации
+    _people_set: frozenset[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._people_set = frozenset(
+            person
+            for person in (p.strip().lower() for p in (self.user_identifier or "").split(","))
+            if person
+        )
 
 
+@lru_cache(maxsize=1024)
 def parse_datetime(value: str) -> Optional[datetime]:
-    """Парсит дату из строки в datetime."""
+    """
+    Парсит дату из строки в datetime.
+
+    Одна и та же дата встречается во многих строках CSV, поэтому результат
+    кэшируется (datetime неизменяем, делить его безопасно).
+    """
     if not value:
         return None
     try:
@@ -44,15 +113,40 @@ def parse_datetime(value: str) -> Optional[datetime]:
         result = datetime.fromisoformat(value.replace('Z', '+00:00'))
         # Убедимся, что дата имеет timezone info
         if result.tzinfo is None:
-            from datetime import timezone
             result = result.replace(tzinfo=timezone.utc)
         return result
     except ValueError:
         # Если не удается распознать формат даты
-        print(f"[CSV Yonote] Ошибка парсинга даты '{value}'")
+        logger.warning("[CSV Yonote] Ошибка парсинга даты '%s'", value)
         return None
 
 
+def _iter_csv_lines(resp: aiohttp.ClientResponse, loop: asyncio.AbstractEventLoop) -> Iterator[str]:
+    """
+    Строки CSV из ответа по мере чтения, без сборки всего тела в одну строку.
+
+    Генератор синхронный - его читает csv.reader в рабочем потоке, а каждый
+    кусок тела запрашивается у цикла событий loop. Байты декодируются
+    инкрементально (utf-8-sig заодно убирает BOM). Строки режутся только по
+    "\n", как при чтении из StringIO: переносы внутри кавычек csv.reader
+    склеивает сам.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    tail = ""  # Незаконченная строка из предыдущего куска
+
+    while True:
+        chunk = asyncio.run_coroutine_threadsafe(resp.content.read(CSV_CHUNK_SIZE), loop).result()
+        if not chunk:
+            break
+        *lines, tail = (tail + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
 class YonoteCsvClient:
     """Клиент для работы с Yonote через CSV экспорт API."""
     
@@ -63,33 +157,50 @@ class YonoteCsvClient:
         if not self.api_key or not self.calendar_id:
             raise ValueError("YONOTE_API_KEY и YONOTE_CALENDAR_ID должны быть заданы")
     
-    async def fetch_deadlines_raw_csv(self) -> str:
-        """Получить сырой CSV с дедлайнами."""
-        csv_url = "https://app.yonote.ru/api/database.export_csv"
-        
+    @asynccontextmanager
+    async def _csv_response(self) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Успешный (200) ответ экспорта CSV; при другом статусе - исключение."""
         params = {
             "id": self.calendar_id,
             "token": self.api_key
         }
         
-        print(f"[CSV Yonote] Запрос CSV по адресу: {csv_url}")
-        print(f"[CSV Yonote] Параметры: {params}")
+        # Параметры целиком не логируем - в них токен
+        logger.debug("[CSV Yonote] Запрос CSV по адресу: %s (календарь %s)", CSV_EXPORT_URL, self.calendar_id)
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(csv_url, params=params) as resp:
-                    print(f"[CSV Yonote] Статус ответа: {resp.status}")
-                    if resp.status == 200:
-                        csv_content = await resp.text()
-                        print(f"[CSV Yonote] Получено {len(csv_content)} символов CSV")
-                        return csv_content
-                    else:
-                        text = await resp.text()
-                        print(f"[CSV Yonote] Ошибка {resp.status}: {text}")
-                        raise Exception(f"Ошибка при получении CSV: {resp.status} - {text}")
-            except Exception as e:
-                print(f"[CSV Yonote] Исключение при запросе: {e}")
-                raise
+        session = await _get_session()
+        try:
+            async with session.get(CSV_EXPORT_URL, params=params) as resp:
+                logger.debug("[CSV Yonote] Статус ответа: %s", resp.status)
+                if resp.status != 200:
+                    text = await resp.text()
+                    logger.error("[CSV Yonote] Ошибка %s: %s", resp.status, text)
+                    raise Exception(f"Ошибка при получении CSV: {resp.status} - {text}")
+                yield resp
+        except Exception as e:
+            logger.error("[CSV Yonote] Исключение при запросе: %s", e)
+            raise
+    
+    async def fetch_deadlines_raw_csv(self) -> str:
+        """Получить сырой CSV с дедлайнами."""
+        async with self._csv_response() as resp:
+            csv_content = await resp.text()
+        logger.debug("[CSV Yonote] Получено %d символов CSV", len(csv_content))
+        return csv_content
+    
+    async def fetch_deadlines_csv(self) -> List[YonoteDeadline]:
+        """
+        Получить дедлайны, разбирая CSV потоково по мере чтения ответа.
+
+        В отличие от fetch_deadlines_raw_csv + parse_csv_to_deadlines, ответ не
+        собирается целиком в строку (и её копию в StringIO): один csv.reader
+        читает строки прямо из ответа, а разбор идёт в рабочем потоке, пока
+        цикл событий подгружает следующие куски.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._csv_response() as resp:
+            reader = csv.reader(_iter_csv_lines(resp, loop), delimiter=';', quotechar='"')
+            return await asyncio.to_thread(self.parse_csv_rows, reader)
     
     def parse_csv_to_deadlines(self, csv_content: str) -> List[YonoteDeadline]:
         """Парсит CSV содержимое в список дедлайнов."""
@@ -103,63 +214,79 @@ class YonoteCsvClient:
         # Читаем первую строку, чтобы определить структуру
         first_line = csv_io.readline()
         if not first_line.strip():
-            print("[CSV Yonote] Пустой CSV файл")
+            logger.warning("[CSV Yonote] Пустой CSV файл")
             return []
         
         # Возвращаемся к началу и читаем как CSV
         csv_io.seek(0)
-        reader = csv.reader(csv_io, delimiter=';', quotechar='"')
+        return self.parse_csv_rows(csv.reader(csv_io, delimiter=';', quotechar='"'))
+    
+    def parse_csv_rows(self, rows: Iterable[List[str]]) -> List[YonoteDeadline]:
+        """Парсит уже разобранные строки CSV (первая - заголовки) в список дедлайнов."""
+        reader = iter(rows)
         
         # Чтение заголовков
         headers = next(reader, None)
         if not headers:
-            print("[CSV Yonote] Нет заголовков в CSV")
+            logger.warning("[CSV Yonote] Нет заголовков в CSV")
             return []
         
-        print(f"[CSV Yonote] Найдены заголовки: {headers}")
+        logger.debug("[CSV Yonote] Найдены заголовки: %s", headers)
         
         # Определяем индексы столбцов
-        title_idx = None
-        people_idx = None
-        song_idx = None  # или description
-        date_idx = None
-        
+        columns: dict[str, int] = {}
         for i, header in enumerate(headers):
             header_lower = header.lower()
-            if any(keyword in header_lower for keyword in ["название", "title", "name"]):
-                title_idx = i
-            elif any(keyword in header_lower for keyword in ["люди", "people", "person", "участник", "member", "assignee"]):
-                people_idx = i
-            elif any(keyword in header_lower for keyword in ["песня", "song", "description", "текст"]):
-                song_idx = i
-            elif any(keyword in header_lower for keyword in ["дата", "date", "due", "deadline", "end", "start"]):
-                date_idx = i
+            for keyword, role in _HEADER_KEYWORDS.items():
+                if keyword in header_lower:
+                    columns[role] = i
+                    break
+        
+        title_idx = columns.get("title")
+        people_idx = columns.get("people")
+        song_idx = columns.get("song")  # или description
+        date_idx = columns.get("date")
         
         if title_idx is None:
-            print(f"[CSV Yonote] Не найден столбец с названиями: {headers}")
+            logger.warning("[CSV Yonote] Не найден столбец с названиями: %s", headers)
             return []
         
+        # Самый правый нужный столбец: короткие строки дополняем до него один раз,
+        # чтобы дальше брать ячейки без проверок длины
+        max_idx = max(idx for idx in (title_idx, people_idx, song_idx, date_idx) if idx is not None)
+        
+        # Пул строк: одинаковые списки людей и даты повторяются во многих строках,
+        # храним по одному объекту на значение (и его хэш считается один раз)
+        pool: dict[str, str] = {}
+        
+        def pooled(value: str) -> str:
+            return pool.setdefault(value, value)
+        
         # Проверяем, что дедлайны есть
         deadlines = []
         for row_num, row in enumerate(reader, start=2):  # начинаем с 2, т.к. 1 - заголовки
             if len(row) <= title_idx:
-                print(f"[CSV Yonote] Строка {row_num} слишком короткая, пропуск")
+                logger.debug("[CSV Yonote] Строка %d слишком короткая, пропуск", row_num)
                 continue
+            if len(row) <= max_idx:
+                # Недостающие ячейки в конце строки считаем пустыми
+                row = row + [""] * (max_idx + 1 - len(row))
             
-            title = row[title_idx].strip() if title_idx < len(row) else ""
+            title = row[title_idx].strip()
             if not title or title in ["", ";", ";;", ";;;"]:  # Пустая строка или заголовки
                 continue
             
             # Получаем остальные поля
-            people = row[people_idx].strip() if people_idx is not None and people_idx < len(row) else None
-            song_desc = row[song_idx].strip() if song_idx is not None and song_idx < len(row) else None
-            date_str = row[date_idx].strip() if date_idx is not None and date_idx < len(row) else None
+            people = pooled(row[people_idx].strip()) if people_idx is not None else None
+            song_desc = row[song_idx].strip() if song_idx is not None else None
+            date_str = pooled(row[date_idx].strip()) if date_idx is not None else None
             
             # Парсим дату
             due_date = parse_datetime(date_str) if date_str else None
             
-            # Создаем уникальный ID на основе заголовка и даты (для совместимости с существующей системой)
-            id_suffix = str(hash(title + (date_str or "")))[:8]
+            # Создаем уникальный ID на основе заголовка и даты (для совместимости с существующей системой).
+            # blake2s, а не hash(): hash строк случайный в каждом процессе, и ID менялись бы после перезапуска
+            id_suffix = hashlib.blake2s((title + (date_str or "")).encode("utf-8"), digest_size=4).hexdigest()
             
             deadline = YonoteDeadline(
                 id=f"csv_{id_suffix}",
@@ -170,9 +297,9 @@ class YonoteCsvClient:
             )
             
             deadlines.append(deadline)
-            print(f"[CSV Yonote] Обработан дедлайн #{len(deadlines)}: '{title}', люди: {people}, дата: {due_date}")
+            logger.debug("[CSV Yonote] Обработан дедлайн #%d: '%s', люди: %s, дата: %s", len(deadlines), title, people, due_date)
         
-        print(f"[CSV Yonote] Всего обработано {len(deadlines)} дедлайнов из CSV")
+        logger.info("[CSV Yonote] Всего обработано %d дедлайнов из CSV", len(deadlines))
         return deadlines
 
     def filter_deadlines_by_user(
@@ -187,24 +314,20 @@ class YonoteCsvClient:
 
         Учитывает, что в user_identifier может быть несколько людей через запятую.
         """
+        # Материализуем один раз: генератор нельзя пройти дважды (для лога ниже)
+        deadlines = list(deadlines)
         if not user_identifier:
-            return list(deadlines)
+            return deadlines
 
         target = user_identifier.strip().lower()
         result: list[YonoteDeadline] = []
         for d in deadlines:
-            if not d.user_identifier:
-                continue
-
-            # Если в дедлайне несколько людей через запятую, проверяем каждого
-            deadline_people = [p.strip().lower() for p in d.user_identifier.split(",")]
-
-            # Проверяем точное совпадение или вхождение в список людей
-            if target in deadline_people:
+            # Люди дедлайна разобраны один раз при создании - здесь только
+            # проверка вхождения в множество
+            if target in d._people_set:
                 result.append(d)
-                print(f"[CSV Yonote] Дедлайн '{d.title}' соответствует пользователю '{target}'")
 
-        print(f"[CSV Yonote] Отфильтровано {len(result)} дедлайнов из {len(list(deadlines))} для пользователя '{target}'")
+        logger.info("[CSV Yonote] Отфильтровано %d дедлайнов из %d для пользователя '%s'", len(result), len(deadlines), target)
         return result
 
 
@@ -215,15 +338,12 @@ async def fetch_csv_user_deadlines(user_identifier: str | None = None) -> List[Y
     - парсит дедлайны
     - фильтрует по пользователю (если указан)
     """
-    print(f"[CSV Yonote] Запрашиваю дедлайны для пользователя: {user_identifier}")
+    logger.debug("[CSV Yonote] Запрашиваю дедлайны для пользователя: %s", user_identifier)
     
     client = YonoteCsvClient()
     
-    # Получаем сырой CSV
-    csv_content = await client.fetch_deadlines_raw_csv()
-    
-    # Парсим в дедлайны
-    parsed = client.parse_csv_to_deadlines(csv_content)
+    # Получаем и парсим CSV потоково, по мере чтения ответа
+    parsed = await client.fetch_deadlines_csv()
     
     # Фильтруем (если указан пользователь)
     if user_identifier:
@@ -257,6 +377,9 @@ if __name__ == "__main__":
         print(f"Дедлайнов для 'ArAhis': {len(arahis_deadlines)}")
         for d in arahis_deadlines:
             print(f"  - {d.title} | Люди: {d.user_identifier} | Дата: {d.due_date}")
+
+        await close_session()
     
-    # Запускаем тест
+    # Запускаем тест (уровень логов - из LOG_LEVEL, как у бота)
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
     asyncio.run(test_csv_api())
\ No newline at end of file
@@ -4,6 +4,7 @@
 
 from __future__ import annotations
 
+import time
 from datetime import UTC, datetime, timezone, timedelta
 
 from sqlalchemy import or_
@@ -15,6 +16,23 @@ from models import Deadline, DeadlineStatus, DeadlineVerification, Subscription,
 # Настройка часового пояса (GMT+3, Moscow)
 MOSCOW_TZ = timezone(timedelta(hours=3))
 
+# Кэш пользователей по telegram_id: {telegram_id: (время загрузки, User | None)}
+USER_CACHE_TTL_SECONDS = 600
+_user_cache: dict[int, tuple[float, User | None]] = {}
+
+
+def invalidate_user_cache(telegram_id: int | None = None) -> None:
+    """
+    Сбросить кэш get_user_by_telegram_id.
+
+    Args:
+        telegram_id: ID пользователя в Telegram; если не указан, кэш очищается целиком
+    """
+    if telegram_id is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(telegram_id, None)
+
 
 def get_or_create_user(telegram_id: int, username: str | None = None) -> User:
     """
@@ -38,17 +56,32 @@ def get_or_create_user(telegram_id: int, username: str | None = None) -> User:
         session.add(user)
         session.commit()
         session.refresh(user)
+        # В кэше мог остаться промах (None) для этого telegram_id
+        invalidate_user_cache(telegram_id)
         return user
     finally:
         session.close()
 
 
 def get_user_by_telegram_id(telegram_id: int) -> User | None:
-    """Получить пользователя по telegram_id."""
+    """
+    Получить пользователя по telegram_id.
+
+    Результат кэшируется на USER_CACHE_TTL_SECONDS, и возвращаемый объект
+    общий для всех вызывающих. Код, изменяющий пользователя, должен вызвать
+    invalidate_user_cache(telegram_id) до изменения и ещё раз после commit
+    (в finally, чтобы неудачный commit не оставил изменения в кэше).
+    """
+    now = time.monotonic()
+    cached = _user_cache.get(telegram_id)
+    if cached and now - cached[0] < USER_CACHE_TTL_SECONDS:
+        return cached[1]
+
     session = SessionLocal()
     try:
         user = session.query(User).filter_by(telegram_id=telegram_id).first()
         print(f"DEBUG: get_user_by_telegram_id({telegram_id}) -> User ID: {user.id if user else None}, username: {repr(user.username) if user else None}")
+        _user_cache[telegram_id] = (now, user)
         return user
     finally:
         session.close()
@@ -83,6 +116,7 @@ def update_user_email(telegram_id: int, email: str) -> User | None:
         user.email = email
         session.commit()
         session.refresh(user)
+        invalidate_user_cache(telegram_id)
         return user
     finally:
         session.close()
@@ -214,6 +248,7 @@ def delete_user(user_id: int) -> bool:
 
         session.delete(user)
         session.commit()
+        invalidate_user_cache(user.telegram_id)
         return True
     finally:
         session.close()
@@ -14,91 +14,96 @@ from block_utils import get_blocked_users, is_user_blocked, block_user, unblock_
 
 def test_block_utils():
     """Тест функций блокировки."""
-    print("TEST: Тестирование функций блокировки пользователей")
-    print("=" * 50)
-
-    # Очистка перед тестами
-    print("Очистка предыдущих блокировок...")
-    blocked = get_blocked_users()
-    for user in blocked:
-        unblock_user(user)
-    print("   [OK]")
-
-    # Тест 1: Получение пустого списка
-    print("1. Тест получения пустого списка заблокированных...")
-    blocked = get_blocked_users()
-    print(f"   Заблокированные пользователи: {blocked}")
-    assert len(blocked) == 0, "Список должен быть пустым"
-    print("   [OK]")
-
-    # Тест 2: Проверка блокировки несуществующего пользователя
-    print("2. Тест проверки блокировки несуществующего пользователя...")
-    assert not is_user_blocked(123456789), "Пользователь не должен быть заблокирован"
-    print("   [OK]")
-
-    # Тест 3: Блокировка пользователя
-    print("3. Тест блокировки пользователя...")
-    success = block_user(123456789, 999999999)
-    assert success, "Блокировка должна быть успешной"
-    assert is_user_blocked(123456789), "Пользователь должен быть заблокирован"
-    print("   [OK]")
-
-    # Тест 4: Получение списка с одним пользователем
-    print("4. Тест получения списка с одним заблокированным...")
-    blocked = get_blocked_users()
-    assert 123456789 in blocked, "Пользователь должен быть в списке"
-    assert len(blocked) == 1, "Должен быть один заблокированный пользователь"
-    print(f"   Заблокированные пользователи: {blocked}")
-    print("   [OK]")
-
-    # Тест 5: Повторная блокировка того же пользователя
-    print("5. Тест повторной блокировки...")
-    success = block_user(123456789, 999999999)
-    assert success, "Повторная блокировка должна быть успешной"
-    blocked = get_blocked_users()
-    assert len(blocked) == 1, "Должен остаться один пользователь"
-    print("   [OK]")
-
-    # Тест 6: Блокировка второго пользователя
-    print("6. Тест блокировки второго пользователя...")
-    success = block_user(987654321, 999999999)
-    assert success, "Блокировка должна быть успешной"
-    blocked = get_blocked_users()
-    assert len(blocked) == 2, "Должно быть два пользователя"
-    assert 123456789 in blocked and 987654321 in blocked, "Оба пользователя должны быть в списке"
-    print(f"   Заблокированные пользователи: {blocked}")
-    print("   [OK]")
-
-    # Тест 7: Разблокировка пользователя
-    print("7. Тест разблокировки пользователя...")
-    success = unblock_user(123456789)
-    assert success, "Разблокировка должна быть успешной"
-    assert not is_user_blocked(123456789), "Пользователь не должен быть заблокирован"
-    blocked = get_blocked_users()
-    assert len(blocked) == 1, "Должен остаться один пользователь"
-    assert 987654321 in blocked, "Второй пользователь должен остаться"
-    print(f"   Заблокированные пользователи: {blocked}")
-    print("   [OK]")
-
-    # Тест 8: Разблокировка несуществующего пользователя
-    print("8. Тест разблокировки несуществующего пользователя...")
-    success = unblock_user(999999999)
-    assert success, "Разблокировка несуществующего пользователя должна быть успешной"
-    blocked = get_blocked_users()
-    assert len(blocked) == 1, "Количество не должно измениться"
-    print("   [OK]")
-
-    # Тест 9: Очистка всех блокировок
-    print("9. Тест очистки всех блокировок...")
-    success = unblock_user(987654321)
-    assert success, "Разблокировка должна быть успешной"
-    blocked = get_blocked_users()
-    assert len(blocked) == 0, "Список должен быть пустым"
-    print(f"   Заблокированные пользователи: {blocked}")
-    print("   [OK]")
-
-    print("\nSUCCESS: Все тесты пройдены успешно!")
-    return True
+    # Сообщения копим и выводим одним вызовом в конце (или при падении теста)
+    log = []
+    try:
+        log.append("TEST: Тестирование функций блокировки пользователей")
+        log.append("=" * 50)
+
+        # Очистка перед тестами
+        log.append("Очистка предыдущих блокировок...")
+        blocked = get_blocked_users()
+        for user in blocked:
+            unblock_user(user)
+        log.append("   [OK]")
+
+        # Тест 1: Получение пустого списка
+        log.append("1. Тест получения пустого списка заблокированных...")
+        blocked = get_blocked_users()
+        log.append(f"   Заблокированные пользователи: {blocked}")
+        assert len(blocked) == 0, "Список должен быть пустым"
+        log.append("   [OK]")
+
+        # Тест 2: Проверка блокировки несуществующего пользователя
+        log.append("2. Тест проверки блокировки несуществующего пользователя...")
+        assert not is_user_blocked(123456789), "Пользователь не должен быть заблокирован"
+        log.append("   [OK]")
+
+        # Тест 3: Блокировка пользователя
+        log.append("3. Тест блокировки пользователя...")
+        success = block_user(123456789, 999999999)
+        assert success, "Блокировка должна быть успешной"
+        assert is_user_blocked(123456789), "Пользователь должен быть заблокирован"
+        log.append("   [OK]")
+
+        # Тест 4: Получение списка с одним пользователем
+        log.append("4. Тест получения списка с одним заблокированным...")
+        blocked = get_blocked_users()
+        assert 123456789 in blocked, "Пользователь должен быть в списке"
+        assert len(blocked) == 1, "Должен быть один заблокированный пользователь"
+        log.append(f"   Заблокированные пользователи: {blocked}")
+        log.append("   [OK]")
+
+        # Тест 5: Повторная блокировка того же пользователя
+        log.append("5. Тест повторной блокировки...")
+        success = block_user(123456789, 999999999)
+        assert success, "Повторная блокировка должна быть успешной"
+        blocked = get_blocked_users()
+        assert len(blocked) == 1, "Должен остаться один пользователь"
+        log.append("   [OK]")
+
+        # Тест 6: Блокировка второго пользователя
+        log.append("6. Тест блокировки второго пользователя...")
+        success = block_user(987654321, 999999999)
+        assert success, "Блокировка должна быть успешной"
+        blocked = get_blocked_users()
+        assert len(blocked) == 2, "Должно быть два пользователя"
+        assert 123456789 in blocked and 987654321 in blocked, "Оба пользователя должны быть в списке"
+        log.append(f"   Заблокированные пользователи: {blocked}")
+        log.append("   [OK]")
+
+        # Тест 7: Разблокировка пользователя
+        log.append("7. Тест разблокировки пользователя...")
+        success = unblock_user(123456789)
+        assert success, "Разблокировка должна быть успешной"
+        assert not is_user_blocked(123456789), "Пользователь не должен быть заблокирован"
+        blocked = get_blocked_users()
+        assert len(blocked) == 1, "Должен остаться один пользователь"
+        assert 987654321 in blocked, "Второй пользователь должен остаться"
+        log.append(f"   Заблокированные пользователи: {blocked}")
+        log.append("   [OK]")
+
+        # Тест 8: Разблокировка несуществующего пользователя
+        log.append("8. Тест разблокировки несуществующего пользователя...")
+        success = unblock_user(999999999)
+        assert success, "Разблокировка несуществующего пользователя должна быть успешной"
+        blocked = get_blocked_users()
+        assert len(blocked) == 1, "Количество не должно измениться"
+        log.append("   [OK]")
+
+        # Тест 9: Очистка всех блокировок
+        log.append("9. Тест очистки всех блокировок...")
+        success = unblock_user(987654321)
+        assert success, "Разблокировка должна быть успешной"
+        blocked = get_blocked_users()
+        assert len(blocked) == 0, "Список должен быть пустым"
+        log.append(f"   Заблокированные пользователи: {blocked}")
+        log.append("   [OK]")
+
+        log.append("\nSUCCESS: Все тесты пройдены успешно!")
+        return True
+    finally:
+        sys.stdout.write("\n".join(log) + "\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Тесты разбора SQL-скриптов миграций на команды и кэша разобранных команд.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Добавляем корневую директорию в путь для импортов
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from scripts import migrate
+from scripts.migrate import split_sql_commands
+
+
+def test_split_sql_commands():
+    """Разделитель `;` не учитывается внутри строк и комментариев."""
+    print("Тестируем split_sql_commands...")
+
+    assert split_sql_commands("") == []
+    assert split_sql_commands(" ;\n; ") == []
+    print("  [OK] Пустой скрипт")
+
+    assert split_sql_commands("CREATE TABLE a (id INTEGER);\nCREATE TABLE b (id INTEGER)") == [
+        "CREATE TABLE a (id INTEGER)",
+        "CREATE TABLE b (id INTEGER)",
+    ]
+    print("  [OK] Последняя команда без `;`")
+
+    sql = (
+        "-- Комментарий; с точкой с запятой\n"
+        "INSERT INTO t VALUES ('a;b', \"c;d\");\n"
+        "INSERT INTO t VALUES ('it''s; fine'); -- хвост; комментария\n"
+        "UPDATE t SET v = '--не комментарий';"
+    )
+    assert split_sql_commands(sql) == [
+        "INSERT INTO t VALUES ('a;b', \"c;d\")",
+        "INSERT INTO t VALUES ('it''s; fine')",
+        "UPDATE t SET v = '--не комментарий'",
+    ]
+    print("  [OK] Строки в кавычках и комментарии")
+
+    assert split_sql_commands("SELECT 1 -- комментарий без перевода строки") == ["SELECT 1"]
+    print("  [OK] Комментарий в конце файла")
+
+
+def test_load_cached_commands():
+    """Команды берутся из кэша, пока файл не изменился."""
+    print("Тестируем кэш разобранных команд...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        migration_file = temp_path / "0001_test.sql"
+        migration_file.write_text("CREATE TABLE a (id INTEGER);", encoding="utf-8")
+
+        with patch.object(migrate, "PARSED_CACHE_FILE", temp_path / ".cache" / "parsed.json"), \
+                patch.object(migrate, "split_sql_commands", wraps=split_sql_commands) as split:
+            assert migrate._load_cached_commands(migration_file) == ["CREATE TABLE a (id INTEGER)"]
+            assert migrate._load_cached_commands(migration_file) == ["CREATE TABLE a (id INTEGER)"]
+            assert split.call_count == 1, "Повторный вызов должен брать команды из кэша"
+            print("  [OK] Повторный разбор не выполняется")
+
+            migration_file.write_text("CREATE TABLE b (id INTEGER); CREATE TABLE c (id INTEGER);", encoding="utf-8")
+            # mtime может совпасть при быстрой записи - сдвигаем явно
+            stat = migration_file.stat()
+            os.utime(migration_file, (stat.st_atime, stat.st_mtime + 10))
+            assert migrate._load_cached_commands(migration_file) == [
+                "CREATE TABLE b (id INTEGER)",
+                "CREATE TABLE c (id INTEGER)",
+            ]
+            assert split.call_count == 2
+            print("  [OK] Изменённый файл разобран заново")
+
+
+if __name__ == "__main__":
+    test_split_sql_commands()
+    test_load_cached_commands()
+    print("\n[OK] Разбор SQL-миграций работает корректно!")
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Тесты HTTP-слоя клиента Yonote: повторы, пагинация и кэш строк календаря.
+
+Сеть не используется: общая сессия _http_session подменяется заглушкой.
+"""
+
+import asyncio
+import json
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import call, patch
+
+import requests
+
+# Добавляем корневую директорию в путь для импортов
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from scripts import yonote_client
+
+
+def _response(status: int, data=None, headers: dict | None = None) -> requests.Response:
+    """Ответ requests с JSON-телом."""
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(data if data is not None else {}).encode("utf-8")
+    response.headers.update(headers or {})
+    return response
+
+
+class _FakeSession:
+    """Подмена requests.Session: ответ на каждый GET строит handler."""
+
+    def __init__(self, handler):
+        self._handler = handler
+        self._lock = threading.Lock()
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.calls.append((url, kwargs))
+        result = self._handler(url, **kwargs)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def offsets(self) -> list[int]:
+        return sorted(int(kwargs["params"]["offset"]) for _, kwargs in self.calls)
+
+
+def _rows_handler(total: int, fail_offsets=(), repeat=False):
+    """Строки календаря: total строк страницами по YONOTE_PAGE_SIZE."""
+    def handler(url, params=None, **kwargs):
+        offset = int(params["offset"])
+        if offset in fail_offsets:
+            return _response(404, {"error": "not found"})
+        start = 0 if repeat else offset
+        count = max(0, min(yonote_client.YONOTE_PAGE_SIZE, total - start))
+        return _response(200, {"data": [{"id": f"row{start + i}"} for i in range(count)]})
+
+    return handler
+
+
+def _reset_caches():
+    yonote_client._rows_cache.clear()
+    yonote_client._yonote_user_cache = {}
+    yonote_client._yonote_users_fetched_at = 0.0
+
+
+def _fetch_rows():
+    return yonote_client._fetch_rows(yonote_client._ROWS_URL, yonote_client._ROWS_PARAMS)
+
+
+def test_get_retries_server_errors_and_429():
+    """5xx и 429 повторяются; для 429 берётся задержка из Retry-After."""
+    print("Тестируем повторы _get...")
+    responses = iter([
+        _response(503),
+        _response(429, headers={"Retry-After": "2"}),
+        _response(200, {"data": []}),
+    ])
+    session = _FakeSession(lambda url, **kwargs: next(responses))
+
+    with patch.object(yonote_client, "_http_session", session), \
+            patch.object(yonote_client.time, "sleep") as sleep:
+        response = yonote_client._get("https://example.test")
+
+    assert response.status_code == 200
+    assert len(session.calls) == 3
+    assert all(kwargs["timeout"] == yonote_client.YONOTE_TIMEOUT for _, kwargs in session.calls)
+    assert sleep.call_count == 2
+    assert 0 <= sleep.call_args_list[0].args[0] <= yonote_client.YONOTE_RETRY_BASE_DELAY
+    assert sleep.call_args_list[1] == call(2.0)
+    print("  [OK] 503 -> 429 (Retry-After: 2) -> 200")
+
+
+def test_get_gives_up_after_retries():
+    """После YONOTE_RETRIES попыток возвращается последний ответ или исключение."""
+    print("Тестируем исчерпание повторов _get...")
+    session = _FakeSession(lambda url, **kwargs: _response(502))
+    with patch.object(yonote_client, "_http_session", session), patch.object(yonote_client.time, "sleep"):
+        response = yonote_client._get("https://example.test")
+    assert response.status_code == 502
+    assert len(session.calls) == yonote_client.YONOTE_RETRIES
+    print("  [OK] 5xx возвращается после всех попыток")
+
+    session = _FakeSession(lambda url, **kwargs: requests.Timeout("timeout"))
+    with patch.object(yonote_client, "_http_session", session), patch.object(yonote_client.time, "sleep"):
+        try:
+            yonote_client._get("https://example.test")
+        except requests.Timeout:
+            pass
+        else:
+            raise AssertionError("Ожидался requests.Timeout")
+    assert len(session.calls) == yonote_client.YONOTE_RETRIES
+    print("  [OK] Таймаут пробрасывается после всех попыток")
+
+
+def test_get_does_not_retry_client_errors():
+    """Ошибки 4xx (кроме 429) не повторяются."""
+    print("Тестируем 4xx в _get...")
+    session = _FakeSession(lambda url, **kwargs: _response(401))
+    with patch.object(yonote_client, "_http_session", session), patch.object(yonote_client.time, "sleep") as sleep:
+        response = yonote_client._get("https://example.test")
+    assert response.status_code == 401
+    assert len(session.calls) == 1
+    assert sleep.call_count == 0
+    print("  [OK] 401 возвращается сразу")
+
+
+def test_fetch_rows_paginates_until_short_page_and_caches():
+    """Страницы запрашиваются до неполной, результат кэшируется на TTL."""
+    print("Тестируем пагинацию и кэш _fetch_rows...")
+    _reset_caches()
+    session = _FakeSession(_rows_handler(250))
+
+    with patch.object(yonote_client, "_http_session", session):
+        rows = _fetch_rows()
+        assert [row["id"] for row in rows] == [f"row{i}" for i in range(250)]
+        assert session.offsets() == [0, 100, 200, 300, 400]
+        print(f"  [OK] Получено {len(rows)} строк")
+
+        calls = len(session.calls)
+        assert _fetch_rows() is rows
+        assert len(session.calls) == calls, "Повторный вызов в пределах TTL не должен идти в сеть"
+        print("  [OK] Повторный вызов взят из кэша")
+
+        # Состариваем запись кэша
+        key, (fetched_at, cached_rows) = next(iter(yonote_client._rows_cache.items()))
+        yonote_client._rows_cache[key] = (fetched_at - yonote_client.YONOTE_ROWS_CACHE_TTL - 1, cached_rows)
+        assert len(_fetch_rows()) == 250
+        assert len(session.calls) > calls, "После TTL строки должны запрашиваться заново"
+        print("  [OK] После TTL строки запрошены заново")
+
+
+def test_fetch_rows_stops_on_repeated_page():
+    """Если API не учитывает offset, пагинация останавливается на повторе."""
+    print("Тестируем повтор страницы...")
+    _reset_caches()
+    session = _FakeSession(_rows_handler(10 ** 6, repeat=True))
+
+    with patch.object(yonote_client, "_http_session", session):
+        rows = _fetch_rows()
+
+    assert len(rows) == yonote_client.YONOTE_PAGE_SIZE
+    assert len(session.calls) <= 1 + yonote_client.YONOTE_PAGE_CONCURRENCY
+    print(f"  [OK] Остановились после {len(session.calls)} запросов")
+
+
+def test_fetch_rows_respects_max_pages():
+    """Не больше YONOTE_MAX_PAGES страниц; неполный результат не кэшируется."""
+    print("Тестируем предел страниц...")
+    _reset_caches()
+    session = _FakeSession(_rows_handler(10 ** 6))
+
+    with patch.object(yonote_client, "_http_session", session), \
+            patch.object(yonote_client, "YONOTE_MAX_PAGES", 3):
+        rows = _fetch_rows()
+        assert len(rows) == 3 * yonote_client.YONOTE_PAGE_SIZE
+        assert session.offsets() == [0, 100, 200]
+        assert not yonote_client._rows_cache, "Обрезанный результат не должен кэшироваться"
+    print("  [OK] Остановились на 3 страницах")
+
+
+def test_fetch_rows_keeps_pages_before_failed_page():
+    """Упавшая страница повторяется, уже полученные страницы не теряются."""
+    print("Тестируем ошибку на средней странице...")
+    _reset_caches()
+    session = _FakeSession(_rows_handler(500, fail_offsets={200}))
+
+    with patch.object(yonote_client, "_http_session", session):
+        rows = _fetch_rows()
+        assert [row["id"] for row in rows] == [f"row{i}" for i in range(200)]
+        assert session.offsets().count(200) == 2, "Упавшая страница должна быть запрошена повторно"
+        assert not yonote_client._rows_cache, "Неполный результат не должен кэшироваться"
+    print(f"  [OK] Сохранено {len(rows)} строк до упавшей страницы")
+
+
+def test_fetch_user_deadlines():
+    """Разбор строк: дата, назначенные пользователи, фильтр; ошибка API -> []."""
+    print("Тестируем fetch_user_deadlines...")
+    _reset_caches()
+    rows = [
+        {"id": "a", "title": "Первый", "values": {"date": {"from": "2025-01-15"}, "people": ["u1", "u2"]}},
+        {"id": "b", "title": "Второй", "values": {"date": {"from": "2025/01/16"}, "people": ["u2", {"x": 1}]}},
+        {"id": "c", "title": "Без людей", "values": None},
+        "не строка-словарь",
+    ]
+    users = [{"id": "u1", "name": "VJ_Games"}, {"id": "u2", "name": "ArAhis"}]
+
+    def handler(url, **kwargs):
+        if url.endswith("/users"):
+            return _response(200, {"data": users})
+        return _response(200, {"data": rows})
+
+    session = _FakeSession(handler)
+    with patch.object(yonote_client, "_http_session", session):
+        everything = asyncio.run(yonote_client.fetch_user_deadlines())
+        mine = asyncio.run(yonote_client.fetch_user_deadlines("VJ_Games"))
+
+    assert [d.id for d in everything] == ["a", "b", "c"]
+    assert everything[0].user_identifier == "VJ_Games, ArAhis"
+    assert everything[0].due_date.isoformat() == "2025-01-15T00:00:00"
+    assert everything[1].due_date.isoformat() == "2025-01-16T00:00:00"
+    assert everything[1].assigned_usernames == frozenset({"ArAhis"})
+    assert everything[2].user_identifier is None
+    assert [d.id for d in mine] == ["a"]
+    print("  [OK] Дедлайны разобраны и отфильтрованы")
+
+    # Ошибка API на первой странице: пустой список, справочник не запрашивается
+    _reset_caches()
+    session = _FakeSession(lambda url, **kwargs: _response(404))
+    with patch.object(yonote_client, "_http_session", session):
+        assert asyncio.run(yonote_client.fetch_user_deadlines("VJ_Games")) == []
+    assert not any(url.endswith("/users") for url, _ in session.calls)
+    print("  [OK] Ошибка API -> []")
+
+
+if __name__ == "__main__":
+    test_get_retries_server_errors_and_429()
+    test_get_gives_up_after_retries()
+    test_get_does_not_retry_client_errors()
+    test_fetch_rows_paginates_until_short_page_and_caches()
+    test_fetch_rows_stops_on_repeated_page()
+    test_fetch_rows_respects_max_pages()
+    test_fetch_rows_keeps_pages_before_failed_page()
+    test_fetch_user_deadlines()
+    print("\n[OK] HTTP-слой клиента Yonote работает корректно!")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Тесты потокового разбора CSV экспорта Yonote.
+"""
+
+import asyncio
+import csv
+import io
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+# Добавляем корневую директорию в путь для импортов
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from scripts import yonote_csv_client
+from scripts.yonote_csv_client import YonoteCsvClient, _iter_csv_lines
+
+# Запись с переносом внутри кавычек, одиночная кавычка в поле без кавычек,
+# CRLF, BOM и кириллица (её байты разрезаются маленькими кусками)
+CSV_TEXT = (
+    "\ufeffНазвание;Люди;Песня;Дата\r\n"
+    'Track 12" mix;VJ_Games;;2025-01-15\r\n'
+    '"Трек; с точкой с запятой";"VJ_Games, ArAhis";"строка 1\nстрока 2 ""цитата""";2025-01-16T10:00:00Z\r\n'
+    "Короткая строка\n"
+    "Последняя;ArAhis;;2025-01-17"
+)
+
+
+class _FakeContent:
+    """Тело ответа, отдаваемое кусками по size байт."""
+
+    def __init__(self, data: bytes):
+        self._data = data
+        self._pos = 0
+
+    async def read(self, size: int) -> bytes:
+        chunk = self._data[self._pos:self._pos + size]
+        self._pos += len(chunk)
+        return chunk
+
+
+class _FakeResponse:
+    def __init__(self, data: bytes):
+        self.content = _FakeContent(data)
+
+
+def _stream_rows(data: bytes) -> list:
+    """Разобрать тело через _iter_csv_lines так же, как fetch_deadlines_csv."""
+    async def run():
+        loop = asyncio.get_running_loop()
+        reader = csv.reader(_iter_csv_lines(_FakeResponse(data), loop), delimiter=';', quotechar='"')
+        return await asyncio.to_thread(list, reader)
+
+    return asyncio.run(run())
+
+
+def test_iter_csv_lines_matches_buffered_reader():
+    """Потоковый разбор даёт те же строки, что csv.reader по StringIO."""
+    print("Тестируем _iter_csv_lines...")
+    expected = list(csv.reader(io.StringIO(CSV_TEXT.lstrip("\ufeff")), delimiter=';', quotechar='"'))
+
+    original_chunk_size = yonote_csv_client.CSV_CHUNK_SIZE
+    try:
+        for chunk_size in (1, 3, 7, 64 * 1024):
+            yonote_csv_client.CSV_CHUNK_SIZE = chunk_size
+            rows = _stream_rows(CSV_TEXT.encode("utf-8"))
+            assert rows == expected, f"Размер куска {chunk_size}: {rows!r} != {expected!r}"
+            print(f"  [OK] Размер куска {chunk_size}")
+    finally:
+        yonote_csv_client.CSV_CHUNK_SIZE = original_chunk_size
+
+    assert _stream_rows(b"") == [], "Пустой ответ - без строк"
+    print("  [OK] Пустой ответ")
+
+
+def test_fetch_deadlines_csv_matches_parse_csv_to_deadlines():
+    """fetch_deadlines_csv разбирает ответ так же, как буферизованный путь."""
+    print("Тестируем fetch_deadlines_csv...")
+    client = YonoteCsvClient(api_key="test", calendar_id="test")
+
+    @asynccontextmanager
+    async def fake_csv_response():
+        yield _FakeResponse(CSV_TEXT.encode("utf-8"))
+
+    client._csv_response = fake_csv_response
+
+    streamed = asyncio.run(client.fetch_deadlines_csv())
+    buffered = client.parse_csv_to_deadlines(CSV_TEXT)
+
+    assert streamed == buffered, f"{streamed!r} != {buffered!r}"
+    assert [d.title for d in streamed] == ['Track 12" mix', "Трек; с точкой с запятой", "Короткая строка", "Последняя"]
+    assert streamed[1].description == 'строка 1\nстрока 2 "цитата"'
+    print(f"  [OK] Разобрано {len(streamed)} дедлайнов")
+
+
+if __name__ == "__main__":
+    test_iter_csv_lines_matches_buffered_reader()
+    test_fetch_deadlines_csv_matches_parse_csv_to_deadlines()
+    print("\n[OK] Потоковый разбор CSV работает корректно!")